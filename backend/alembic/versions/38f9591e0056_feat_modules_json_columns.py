@@ -0,0 +1,49 @@
+"""feat: modules json columns
+
+Revision ID: 38f9591e0056
+Revises: 978b5d4a4f0a
+Create Date: 2026-02-14 11:20:37.881652
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '38f9591e0056'
+down_revision: Union[str, Sequence[str], None] = '978b5d4a4f0a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # SQLite stores JSON as TEXT, so existing rows are already compatible there;
+    # only Postgres needs the column converted to native JSONB.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for column in ('content_json', 'quiz_questions_json'):
+        op.alter_column(
+            'modules', column,
+            existing_type=sa.Text(),
+            type_=postgresql.JSONB(),
+            existing_nullable=False,
+            postgresql_using=f'{column}::jsonb',
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for column in ('content_json', 'quiz_questions_json'):
+        op.alter_column(
+            'modules', column,
+            existing_type=postgresql.JSONB(),
+            type_=sa.Text(),
+            existing_nullable=False,
+            postgresql_using=f'{column}::text',
+        )
@@ -0,0 +1,54 @@
+"""feat: generated quizzes composite index
+
+Revision ID: 66981ec355cc
+Revises: 38f9591e0056
+Create Date: 2026-10-15 10:12:44.503127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '66981ec355cc'
+down_revision: Union[str, Sequence[str], None] = '38f9591e0056'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_SINGLE_COLUMN_INDEXES = ('module_id', 'trader_type', 'user_id')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # generated_quizzes is created by create_all at startup rather than by a
+    # migration; on a fresh database it will be built from the model instead
+    inspector = sa.inspect(op.get_bind())
+    if 'generated_quizzes' not in inspector.get_table_names():
+        return
+
+    # module_id leads uq_module_trader_user and user_id / trader_type lead the
+    # composite index, so the single-column indexes are redundant
+    existing = {index['name'] for index in inspector.get_indexes('generated_quizzes')}
+    for column in _SINGLE_COLUMN_INDEXES:
+        name = op.f(f'ix_generated_quizzes_{column}')
+        if name in existing:
+            op.drop_index(name, table_name='generated_quizzes')
+    op.create_index(
+        'idx_gq_user_trader_module',
+        'generated_quizzes',
+        ['user_id', 'trader_type', 'module_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if 'generated_quizzes' not in inspector.get_table_names():
+        return
+
+    op.drop_index('idx_gq_user_trader_module', table_name='generated_quizzes')
+    for column in _SINGLE_COLUMN_INDEXES:
+        op.create_index(op.f(f'ix_generated_quizzes_{column}'), 'generated_quizzes', [column], unique=False)
@@ -0,0 +1,101 @@
+"""feat: init user stats
+
+Revision ID: 66f9b344aeb8
+Revises: 77402a4b3b5c
+Create Date: 2026-02-14 10:12:41.503127
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+# revision identifiers, used by Alembic.
+revision: str = '66f9b344aeb8'
+down_revision: Union[str, Sequence[str], None] = '77402a4b3b5c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+users = sa.table('users', sa.column('id', sa.Integer))
+
+user_stats = sa.table(
+    'user_stats',
+    sa.column('user_id', sa.Integer),
+    sa.column('total_exp', sa.Integer),
+    sa.column('current_level', sa.Integer),
+    sa.column('skill_technical_analysis', sa.Integer),
+    sa.column('skill_risk_management', sa.Integer),
+    sa.column('skill_psychology', sa.Integer),
+    sa.column('skill_market_structure', sa.Integer),
+    sa.column('current_streak_days', sa.Integer),
+    sa.column('longest_streak_days', sa.Integer),
+    sa.column('modules_completed_count', sa.Integer),
+    sa.column('quiz_total_attempts', sa.Integer),
+    sa.column('quiz_correct_answers', sa.Integer),
+)
+
+# Default values for a fresh user_stats row (matches the UserStats model)
+STATS_DEFAULTS = {
+    'total_exp': 0,
+    'current_level': 1,
+    'skill_technical_analysis': 0,
+    'skill_risk_management': 0,
+    'skill_psychology': 0,
+    'skill_market_structure': 0,
+    'current_streak_days': 0,
+    'longest_streak_days': 0,
+    'modules_completed_count': 0,
+    'quiz_total_attempts': 0,
+    'quiz_correct_answers': 0,
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Backfill a default user_stats row for every user that doesn't have one yet.
+    # Built with SQLAlchemy Core so a single INSERT ... SELECT runs on every
+    # dialect, keeping the work inside the database.
+    # No user ids are pulled into Python, so memory use stays flat no
+    # matter how large the users table is.
+    # user_stats is created by create_all at startup rather than by a
+    # migration; on a fresh database there is nothing to backfill yet.
+    # Offline (--sql) mode has no database to inspect, so always emit it there
+    if not context.is_offline_mode() and 'user_stats' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    dialect_name = op.get_context().dialect.name
+    columns = ['user_id', *STATS_DEFAULTS.keys()]
+    defaults = [sa.literal(value, sa.Integer) for value in STATS_DEFAULTS.values()]
+
+    if dialect_name in ('postgresql', 'sqlite'):
+        # Let the unique index on user_stats.user_id skip existing rows
+        # instead of probing for them (ON CONFLICT DO NOTHING).
+        # SQLite needs a WHERE clause to parse INSERT ... SELECT ... ON CONFLICT.
+        dialect_insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+        all_users = sa.select(users.c.id, *defaults).where(sa.true())
+        statement = (
+            dialect_insert(user_stats)
+            .from_select(columns, all_users)
+            .on_conflict_do_nothing(index_elements=['user_id'])
+        )
+    else:
+        missing_users = (
+            sa.select(users.c.id, *defaults)
+            .select_from(users.outerjoin(user_stats, user_stats.c.user_id == users.c.id))
+            .where(user_stats.c.user_id.is_(None))
+        )
+        statement = user_stats.insert().from_select(columns, missing_users)
+
+    # A single statement is atomic on its own and runs in the migration's
+    # transaction; op.execute also renders it in offline (--sql) mode.
+    op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Data-only migration: backfilled rows are indistinguishable from
+    # rows created at runtime, so there is nothing safe to undo.
+    pass
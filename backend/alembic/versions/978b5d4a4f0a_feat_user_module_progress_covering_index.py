@@ -0,0 +1,53 @@
+"""feat: user module progress covering index
+
+Revision ID: 978b5d4a4f0a
+Revises: 66f9b344aeb8
+Create Date: 2026-02-14 10:48:05.219384
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '978b5d4a4f0a'
+down_revision: Union[str, Sequence[str], None] = '66f9b344aeb8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # user_module_progress is created by create_all at startup rather than by
+    # a migration; on a fresh database it will be built from the model instead
+    inspector = sa.inspect(op.get_bind())
+    if 'user_module_progress' not in inspector.get_table_names():
+        return
+
+    # The composite index leads with user_id, so the single-column index is redundant
+    existing = {index['name'] for index in inspector.get_indexes('user_module_progress')}
+    if op.f('ix_user_module_progress_user_id') in existing:
+        op.drop_index(op.f('ix_user_module_progress_user_id'), table_name='user_module_progress')
+    if 'idx_user_module_user_mod' not in existing:
+        op.create_index(
+            'idx_user_module_user_mod',
+            'user_module_progress',
+            ['user_id', 'module_id', 'status'],
+            unique=False,
+            postgresql_include=['completion_percent'],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if 'user_module_progress' not in inspector.get_table_names():
+        return
+
+    existing = {index['name'] for index in inspector.get_indexes('user_module_progress')}
+    if 'idx_user_module_user_mod' in existing:
+        op.drop_index('idx_user_module_user_mod', table_name='user_module_progress')
+    if op.f('ix_user_module_progress_user_id') not in existing:
+        op.create_index(op.f('ix_user_module_progress_user_id'), 'user_module_progress', ['user_id'], unique=False)
@@ -22,6 +22,8 @@ class AISettings(BaseSettings):
     anthropic_api_key: str = Field(default="", alias="ANTHROPIC_API_KEY")
     anthropic_model_name: str = Field(default="claude-sonnet-4-20250514", alias="ANTHROPIC_MODEL_NAME")
     anthropic_max_tokens: int = Field(default=4096, alias="ANTHROPIC_MAX_TOKENS")
+    anthropic_concurrency: int = Field(default=4, alias="ANTHROPIC_CONCURRENCY")
+    anthropic_max_retries: int = Field(default=2, alias="ANTHROPIC_MAX_RETRIES")
 
     # Embedding Configuration
     embedding_model_name: str = Field(
@@ -29,10 +31,23 @@ class AISettings(BaseSettings):
         alias="EMBEDDING_MODEL_NAME"
     )
     embedding_cache_dir: str = Field(default="./models", alias="EMBEDDING_CACHE_DIR")
+    # "torch", or "onnx" to run the model with ONNX Runtime (needs optimum[onnxruntime])
+    embedding_backend: str = Field(default="torch", alias="EMBEDDING_BACKEND")
+    # Optional model file for the ONNX backend, e.g. a quantized "onnx/model_qint8_avx512.onnx"
+    embedding_model_file: str = Field(default="", alias="EMBEDDING_MODEL_FILE")
+    # Intra-op threads for torch; 0 uses every core. With several uvicorn
+    # workers, set this to cores / workers so they don't oversubscribe the CPU
+    torch_threads: int = Field(default=0, alias="TPT_TORCH_THREADS")
 
     # General Settings
     debug_mode: bool = Field(default=False, alias="AI_DEBUG_MODE")
     request_timeout: int = Field(default=30, alias="AI_REQUEST_TIMEOUT")
+    llm_cache_ttl: int = Field(default=86400, alias="LLM_CACHE_TTL")
+    generic_lesson_cache_ttl: int = Field(default=604800, alias="GENERIC_LESSON_CACHE_TTL")
+    chat_max_sessions: int = Field(default=10000, alias="CHAT_MAX_SESSIONS")
+    # Insights are reused for a user while their stats stay this similar (cosine)
+    insight_cache_threshold: float = Field(default=0.97, alias="INSIGHT_CACHE_THRESHOLD")
+    insight_cache_ttl: int = Field(default=900, alias="INSIGHT_CACHE_TTL")
 
     model_config = {
         "env_file": ".env",
@@ -1,28 +1,39 @@
+"""
+Deriv Configuration Settings
+
+Loads the Deriv app id and API token from environment variables (or .env),
+so the account token is not kept in source control.
+"""
+from functools import lru_cache
 from deriv_api import DerivAPI
-import asyncio
+from pydantic_settings import BaseSettings
+from pydantic import Field
+
+
+class DerivSettings(BaseSettings):
+    """Deriv API configuration loaded from environment variables."""
 
-deriv_api_token = "QoJw6lc5q0Z6n7X"        # Hardcoded for now, should be stored securely
-deriv_app_id = 125387                      # Hardcoded for now, should be stored securely
-# _deriv_api_instance = None
+    deriv_api_token: str = Field(default="", alias="DERIV_API_TOKEN")
+    deriv_app_id: int = Field(default=125387, alias="DERIV_APP_ID")
 
-# def get_deriv_api():
-#     """Get the configured Deriv API instance, lazy-loaded and reconnect if closed."""
-#     global _deriv_api_instance
+    model_config = {
+        "env_file": ".env",
+        "env_file_encoding": "utf-8",
+        "case_sensitive": False,
+        "extra": "ignore"
+    }
 
-#     reconnect = False
+    def is_token_configured(self) -> bool:
+        """Check if a Deriv API token is configured."""
+        return bool(self.deriv_api_token)
 
-#     if _deriv_api_instance is None:
-#         reconnect = True
-#     else:
-#         # Check if the WebSocket inside DerivAPI exists and is open
-#         try:
-#             # Some DerivAPI clients use self.ws.sock.connected
-#             if not getattr(_deriv_api_instance, 'ws', None) or not getattr(_deriv_api_instance.ws, 'sock', None) or not _deriv_api_instance.ws.sock.connected:
-#                 reconnect = True
-#         except Exception:
-#             reconnect = True
 
-#     if reconnect:
-#         _deriv_api_instance = DerivAPI(app_id=deriv_app_id)
+@lru_cache()
+def get_deriv_settings() -> DerivSettings:
+    """
+    Get cached Deriv settings instance.
 
-#     return _deriv_api_instance
+    Returns:
+        DerivSettings: The configured Deriv settings
+    """
+    return DerivSettings()
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Boolean, func, ForeignKeyConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Boolean, JSON, func, ForeignKeyConstraint, UniqueConstraint, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from app.config.db import Base
 
 class Module(Base):
@@ -8,8 +9,8 @@ class Module(Base):
     title = Column(String, nullable=False)
     category = Column(String, nullable=False, index=True)
     difficulty = Column(String, nullable=False, index=True)
-    content_json = Column(Text, nullable=False)
-    quiz_questions_json = Column(Text, nullable=False)
+    content_json = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    quiz_questions_json = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
     exp_reward = Column(Integer, nullable=False, default=50)
     estimated_minutes = Column(Integer, nullable=False, default=5)
     key_concepts = Column(Text, nullable=True)
@@ -21,7 +22,7 @@ class UserModuleProgress(Base):
     __tablename__ = "user_module_progress"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, nullable=False, index=True)
+    user_id = Column(Integer, nullable=False)  # covered by idx_user_module_user_mod
     module_id = Column(Integer, nullable=False, index=True)
     status = Column(String, nullable=False, default="not_started")
     completion_percent = Column(Integer, nullable=False, default=0)
@@ -36,6 +37,11 @@ class UserModuleProgress(Base):
         ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
         ForeignKeyConstraint(['module_id'], ['modules.id'], ondelete='CASCADE'),
         UniqueConstraint('user_id', 'module_id', name='uq_user_module'),
+        # Covering index for per-user progress lookups (status / completion reads)
+        Index(
+            'idx_user_module_user_mod', 'user_id', 'module_id', 'status',
+            postgresql_include=['completion_percent'],
+        ),
     )
 
 
@@ -68,9 +74,9 @@ class GeneratedQuiz(Base):
     __tablename__ = "generated_quizzes"
 
     id = Column(Integer, primary_key=True, index=True)
-    module_id = Column(Integer, nullable=False, index=True)
-    trader_type = Column(String, nullable=False, index=True)
-    user_id = Column(Integer, nullable=False, index=True)
+    module_id = Column(Integer, nullable=False)  # covered by uq_module_trader_user
+    trader_type = Column(String, nullable=False)  # covered by idx_gq_user_trader_module
+    user_id = Column(Integer, nullable=False)  # covered by idx_gq_user_trader_module
     quiz_questions_json = Column(Text, nullable=False)
     ai_generated = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -78,4 +84,7 @@ class GeneratedQuiz(Base):
     __table_args__ = (
         ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
         UniqueConstraint('module_id', 'trader_type', 'user_id', name='uq_module_trader_user'),
+        # Per-user quiz lookups filter on user_id + trader_type; module_id is
+        # included so listing a user's quizzed modules reads only the index
+        Index('idx_gq_user_trader_module', 'user_id', 'trader_type', 'module_id'),
     )
\ No newline at end of file
@@ -8,6 +8,8 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, FileResponse
 from app.routers.education import router as education_router
 from app.routers.claude import router as claude_router
+from app.services.ai.llm.client import close_anthropic_client
+from app.services.ai.llm.insights.insights import get_insight_generator
 
 
 app = FastAPI(title="PocketPT Backend (with Python FastAPI + SQLite)")
@@ -38,6 +40,17 @@ app.include_router(claude_router)
 # Resolve extension directory for static files
 EXTENSION_DIR = Path(__file__).resolve().parent.parent.parent / "extension"
 
+@app.on_event("startup")
+async def startup():
+    # Build the insight generator and shared Anthropic client up front so
+    # the first request doesn't pay for settings parsing and client setup
+    get_insight_generator()._get_client()
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Close pooled Anthropic connections
+    await close_anthropic_client()
+
 @app.get("/")
 def health():
     return {"status": "ok"}
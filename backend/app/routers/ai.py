@@ -8,7 +8,9 @@ Provides endpoints for:
 - Topic suggestions based on user patterns
 """
 from typing import List, Optional
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from app.config.db import get_db
@@ -129,6 +131,18 @@ async def health_check():
     }
 
 
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Report AI cache counters.
+
+    Returns hit/miss counts and sizes of the insight response caches.
+    """
+    return {
+        "insight_cache": get_insight_generator().cache_stats()
+    }
+
+
 @router.get("/insights/{user_id}", response_model=InsightsResponse)
 async def get_trading_insights(
     user_id: int,
@@ -176,6 +190,32 @@ async def get_trading_insights(
         )
 
 
+@router.get("/insights/{user_id}/stream")
+async def stream_trading_insights(
+    user_id: int,
+    limit: int = Query(default=7, ge=1, le=90, description="Number of days to analyze"),
+):
+    """
+    Stream trading insights for a user one at a time.
+
+    Takes the same parameters as /insights/{user_id}, but returns
+    newline-delimited JSON (one InsightItem per line) as soon as each
+    insight has been generated. If generation fails part way, the last
+    line is {"type": "error", "message": ...}.
+    """
+    generator = get_insight_generator()
+
+    async def insight_lines():
+        try:
+            async for insight in generator.generate_insights_stream(user_id, limit):
+                yield orjson.dumps(insight) + b"\n"
+        except Exception as e:
+            logger.error(f"Error streaming insights for user {user_id}: {e}")
+            yield orjson.dumps({"type": "error", "message": f"Error streaming insights: {str(e)}"}) + b"\n"
+
+    return StreamingResponse(insight_lines(), media_type="application/x-ndjson")
+
+
 @router.post("/lesson/generate", response_model=LessonResponse)
 async def generate_lesson(request: LessonRequest):
     """
@@ -237,6 +277,37 @@ async def generate_lesson(request: LessonRequest):
         )
 
 
+@router.post("/lesson/stream")
+async def stream_lesson(request: LessonRequest):
+    """
+    Stream a personalized trading lesson section by section.
+
+    Takes the same request body as /lesson/generate, but returns
+    newline-delimited JSON (one LessonSection per line) as soon as each
+    section has been generated. If generation fails part way, the last
+    line is {"type": "error", "message": ...}.
+    """
+    generator = get_education_generator()
+
+    async def section_lines():
+        try:
+            async for section in generator.generate_lesson_stream(
+                user_id=request.user_id,
+                topic=request.topic,
+                instruments=request.instruments,
+                weakness=request.weakness,
+                performance_summary=request.performance_summary,
+                length=request.length,
+                include_examples=request.include_examples
+            ):
+                yield orjson.dumps(section) + b"\n"
+        except Exception as e:
+            logger.error(f"Error streaming lesson: {e}")
+            yield orjson.dumps({"type": "error", "message": f"Error streaming lesson: {str(e)}"}) + b"\n"
+
+    return StreamingResponse(section_lines(), media_type="application/x-ndjson")
+
+
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_assistant(request: ChatRequest):
     """
@@ -275,6 +346,38 @@ async def chat_with_assistant(request: ChatRequest):
         )
 
 
+@router.post("/chat/stream")
+async def stream_chat_with_assistant(request: ChatRequest):
+    """
+    Chat with the trading assistant, streaming the reply as plain text.
+
+    Takes the same request body as /chat. The session ID is returned in
+    the X-Session-Id response header so the client can continue the
+    conversation.
+    """
+    chatbot = get_chatbot()
+
+    try:
+        session_id, chunks = await chatbot.chat_stream(
+            session_id=request.session_id,
+            user_id=request.user_id,
+            message=request.message,
+            user_context=request.user_context
+        )
+    except Exception as e:
+        logger.error(f"Error in chat: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error in chat: {str(e)}"
+        )
+
+    return StreamingResponse(
+        chunks,
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Session-Id": session_id}
+    )
+
+
 @router.get("/suggest-topic/{user_id}", response_model=TopicSuggestionResponse)
 async def suggest_topics(
     user_id: int
@@ -293,9 +396,8 @@ async def suggest_topics(
     try:
         # Get user's trading patterns for context
         analysis = get_analysis_service()
-        trades = analysis.get_trades(limit=30)
-        stats = analysis.calculate_statistics(trades)
-        patterns = analysis.detect_patterns(trades)
+        trades = await analysis.get_trades(limit=30)
+        stats, patterns = analysis.analyze_trades(trades)
 
         # Extract detected pattern names
         pattern_names = [p.pattern.value for p in patterns if p.detected]
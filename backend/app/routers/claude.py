@@ -10,7 +10,7 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from app.config.ai import get_ai_settings
 from app.services.logger.logger import logger
-from anthropic import AsyncAnthropic
+from app.services.ai.llm.client import get_anthropic_client, llm_timeout
 
 router = APIRouter(prefix="/api/claude", tags=["Claude API"])
 
@@ -64,11 +64,12 @@ async def call_claude(request: ClaudeRequest):
                 detail="Anthropic API key not configured"
             )
 
-        client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+        client = get_anthropic_client()
 
         response = await client.messages.create(
             model=request.model,
             max_tokens=request.max_tokens,
+            timeout=llm_timeout(request.max_tokens),
             temperature=request.temperature,
             system=(
                 [{"type": "text", "text": request.system}]
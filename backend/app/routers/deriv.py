@@ -1,5 +1,4 @@
 from fastapi import APIRouter
-from app.config.deriv import deriv_api_token
 from app.services.deriv.deriv import get_deriv_service
 
 router = APIRouter(prefix="/deriv", tags=["deriv"])
@@ -24,7 +24,7 @@ from app.config.ai import get_ai_settings
 from app.services.ai.llm.education.module_generator import get_module_generator, MODULES
 from app.services.deriv.deriv import get_deriv_service
 from app.services.analysis.analysis import get_analysis_service
-from anthropic import Anthropic
+from app.services.ai.llm.client import get_anthropic_client
 from app.services.logger.logger import logger
 
 router = APIRouter(prefix="/education", tags=["Education"])
@@ -41,8 +41,8 @@ with DBSession(engine) as _db:
             _db.add(Module(
                 id=m["id"], title=m["title"], category=m["category"],
                 difficulty="beginner",
-                content_json=json.dumps({"focus": m.get("momentum_focus", "")}),
-                quiz_questions_json=json.dumps([]),
+                content_json={"focus": m.get("momentum_focus", "")},
+                quiz_questions_json=[],
                 exp_reward=m["exp_reward"], estimated_minutes=m["estimated_minutes"],
                 key_concepts=",".join(m.get("key_concepts", [])),
             ))
@@ -193,9 +193,9 @@ async def analyze_trade_decision(
         
         # Call Claude API for analysis
         settings = get_ai_settings()
-        anthropic_client = Anthropic(api_key=settings.anthropic_api_key)
+        anthropic_client = get_anthropic_client()
         
-        response = anthropic_client.messages.create(
+        response = await anthropic_client.messages.create(
             model=settings.anthropic_model_name,
             max_tokens=1024,
             system=UNIFIED_ANALYSIS_SYSTEM_PROMPT,
@@ -316,9 +316,9 @@ async def get_module_detail(
     if not module:
         raise HTTPException(status_code=404, detail="Module not found")
     
-    # Parse JSON content
-    content = json.loads(module.content_json)
-    quiz = json.loads(module.quiz_questions_json)
+    # JSON columns are decoded by the database driver
+    content = module.content_json
+    quiz = module.quiz_questions_json
     
     # Get user progress if user_id provided
     progress = None
@@ -380,7 +380,7 @@ async def submit_quiz(
         raise HTTPException(status_code=404, detail="Module not found")
     
     # Get quiz questions
-    quiz_questions = json.loads(module.quiz_questions_json)
+    quiz_questions = module.quiz_questions_json
     
     # Grade quiz
     correct_count = 0
@@ -558,17 +558,19 @@ async def generate_curriculum(
     ai_generated_count = 0
     cached_count = 0
 
-    for module_def in MODULES:
-        mid = module_def["id"]
-
-        # Check if quiz already exists for this module/trader/user
-        existing = db.query(GeneratedQuiz).filter(
-            GeneratedQuiz.module_id == mid,
+    # Modules that already have a stored quiz for this user/trader type,
+    # fetched once up front instead of one query per module
+    existing_module_ids = {
+        module_id for (module_id,) in db.query(GeneratedQuiz.module_id).filter(
             GeneratedQuiz.trader_type == trader_type,
             GeneratedQuiz.user_id == request.user_id,
-        ).first()
+        )
+    }
+
+    for module_def in MODULES:
+        mid = module_def["id"]
 
-        if existing:
+        if mid in existing_module_ids:
             cached_count += 1
             continue
 
@@ -7,14 +7,40 @@ for semantic similarity search.
 Uses sentence-transformers for local embedding generation (no API cost).
 """
 from typing import List, Optional, Dict, Any, Tuple
+from collections import OrderedDict
 from functools import lru_cache
+from pathlib import Path
+import hashlib
+import json
+import os
+import threading
+import numpy as np
 from app.services.logger.logger import logger
-from sentence_transformers import SentenceTransformer
 from app.config.ai import get_ai_settings
 
 
+# Texts per forward pass when embedding a batch
+EMBEDDING_BATCH_SIZE = 64
+
+# Max embeddings kept by get_embeddings, least recently used evicted first
+EMBEDDING_CACHE_SIZE = 4096
+
+# search_lessons shortlists by sign-bit Hamming distance once the index has
+# this many lessons, then reranks BINARY_RERANK_FACTOR * top_k of them exactly
+BINARY_SHORTLIST_MIN_LESSONS = 2048
+BINARY_RERANK_FACTOR = 4
+
+# Set bits per byte value, for Hamming distance over packed bits
+_POPCOUNT_U8 = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(axis=1).astype(np.uint8)
+
+# Files written by save_index / read by load_index
+LESSON_MATRIX_FILE = "lesson_matrix.i8.npy"
+LESSON_SCALES_FILE = "lesson_scales.f32.npy"
+LESSON_IDS_FILE = "lesson_ids.json"
+
 # Lazy-loaded model to avoid slow startup
 _model = None
+_model_lock = threading.Lock()
 
 def _get_embedding_model():
     """
@@ -25,21 +51,152 @@ def _get_embedding_model():
     """
     global _model
     if _model is None:
+        # Locked so concurrent first calls don't each load the model
+        with _model_lock:
+            if _model is None:
+                try:
+                    # Imported here: sentence-transformers pulls in torch, which
+                    # costs seconds and hundreds of MB at import time
+                    from sentence_transformers import SentenceTransformer
+
+                    settings = get_ai_settings()
+                    _configure_torch_threads(settings.torch_threads)
+                    logger.info(
+                        f"Loading embedding model: {settings.embedding_model_name} "
+                        f"(backend: {settings.embedding_backend})"
+                    )
+                    try:
+                        _model = _load_sentence_transformer(
+                            SentenceTransformer, settings.embedding_backend, settings.embedding_model_file
+                        )
+                    except Exception as e:
+                        if settings.embedding_backend == "torch":
+                            raise
+                        # e.g. optimum/onnxruntime not installed or no ONNX export available
+                        logger.warning(f"Embedding backend '{settings.embedding_backend}' unavailable ({e}); using torch")
+                        _model = _load_sentence_transformer(SentenceTransformer, "torch", "")
+                    logger.info("Embedding model loaded successfully")
+                except ImportError:
+                    logger.warning("sentence-transformers not installed. Using fallback embeddings.")
+                    _model = "fallback"
+                except Exception as e:
+                    logger.error(f"Failed to load embedding model: {e}")
+                    _model = "fallback"
+    return _model
+
+
+def _configure_torch_threads(num_threads: int) -> None:
+    """
+    Size torch's CPU thread pools before the model runs.
+
+    Some server images leave torch with a single intra-op thread, which
+    leaves the encoder's matmuls on one core. Called once, from the model
+    load, since the inter-op pool can't be resized after first use.
+
+    Args:
+        num_threads: Intra-op thread count; 0 means os.cpu_count()
+    """
+    try:
+        import torch
+
+        torch.set_num_threads(num_threads or os.cpu_count() or 1)
+        torch.set_num_interop_threads(2)
+    except Exception as e:
+        logger.warning(f"Could not configure torch threads: {e}")
+
+
+# Lazy-loaded optional SimSIMD module (False once known to be unavailable)
+_simsimd = None
+
+def _get_simsimd():
+    """Return the simsimd module if it is installed, else None."""
+    global _simsimd
+    if _simsimd is None:
         try:
-            settings = get_ai_settings()
-            logger.info(f"Loading embedding model: {settings.embedding_model_name}")
-            _model = SentenceTransformer(
-                settings.embedding_model_name,
-                cache_folder=settings.embedding_cache_dir
-            )
-            logger.info("Embedding model loaded successfully")
+            import simsimd
+            _simsimd = simsimd
         except ImportError:
-            logger.warning("sentence-transformers not installed. Using fallback embeddings.")
-            _model = "fallback"
-        except Exception as e:
-            logger.error(f"Failed to load embedding model: {e}")
-            _model = "fallback"
-    return _model
+            _simsimd = False
+    return _simsimd or None
+
+
+def _load_sentence_transformer(model_cls, backend: str, model_file: str):
+    """
+    Construct the SentenceTransformer for the given backend.
+
+    The "onnx" backend runs the model with ONNX Runtime; `model_file`
+    selects a specific export, such as a dynamically int8-quantized one.
+    """
+    settings = get_ai_settings()
+    kwargs: Dict[str, Any] = {"cache_folder": settings.embedding_cache_dir}
+    if backend != "torch":
+        kwargs["backend"] = backend
+        if model_file:
+            kwargs["model_kwargs"] = {"file_name": model_file}
+    return model_cls(settings.embedding_model_name, **kwargs)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize along the last axis; zero vectors stay zero."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / (norms + 1e-12)
+
+
+def _cosine_dispatch(query: np.ndarray, candidates: np.ndarray, normalized: bool = False):
+    """
+    Cosine similarity of `query` to `candidates`, picking the primitive by shape.
+
+    - 1-D `candidates` (a single pair): one np.dot plus the two norms, with
+      no normalized temporaries. At this size the cost is call overhead,
+      not arithmetic. Returns a float; zero vectors score 0.
+    - 2-D `candidates`: rows are normalized, unless `normalized` says they
+      already are, and scored with a single matrix-vector product. This
+      reads the matrix once, which is what bounds it. Returns one score per row.
+
+    The int8 lesson index is pre-normalized at index time and scored
+    separately in `search_lessons`.
+    """
+    if candidates.ndim == 1:
+        norms = np.linalg.norm(query) * np.linalg.norm(candidates)
+        if norms == 0:
+            return 0.0
+        return float(np.dot(query, candidates) / norms)
+
+    if not normalized:
+        candidates = _normalize(candidates)
+    return candidates @ _normalize(query)
+
+
+def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scalar-quantize vectors to int8 with one scale per vector.
+
+    Each vector is divided by max(|v|) / 127 and rounded, so
+    `q * scale` approximates the original values.
+
+    Returns:
+        Tuple of (int8 values, float32 scales); a zero vector gets scale 0
+    """
+    scales = (np.abs(vectors).max(axis=-1) / 127.0).astype(np.float32)
+    safe = np.where(scales == 0, 1.0, scales)
+    quantized = np.rint(vectors / safe[..., None]).astype(np.int8)
+    return quantized, scales
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the `k` highest scores, best first.
+
+    Uses a linear-time partition to pick the top k, then sorts only those;
+    equal scores keep their input order.
+    """
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.size:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(scores.size)
+    return idx[np.lexsort((idx, -scores[idx]))]
 
 
 class EmbeddingService:
@@ -52,11 +209,20 @@ class EmbeddingService:
 
     def __init__(self):
         """Initialize the embedding service."""
-        self._lesson_embeddings: Dict[str, Any] = {}
-        self._concept_embeddings: Dict[str, Any] = {}
-        self._topic_cache: Dict[str, List[float]] = {}
-
-    def get_embedding(self, text: str) -> List[float]:
+        # Indexed lessons: row i of the int8 matrix is the quantized,
+        # pre-normalized embedding of lesson _lesson_ids[i], with scale
+        # _lesson_scales[i]
+        self._lesson_ids: List[str] = []
+        self._lesson_rows: Dict[str, int] = {}
+        self._lesson_matrix: Optional[np.ndarray] = None
+        self._lesson_scales: Optional[np.ndarray] = None
+        # Sign bits of the lesson matrix, packed 8 per byte; built on demand
+        self._lesson_bits: Optional[np.ndarray] = None
+        self._concept_embeddings: Dict[str, np.ndarray] = {}
+        # Text digest -> read-only embedding row, for get_embeddings
+        self._embedding_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+
+    def get_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
 
@@ -64,7 +230,7 @@ class EmbeddingService:
             text: The text to embed
 
         Returns:
-            List of floats representing the embedding vector
+            float32 embedding vector (call .tolist() where JSON is needed)
         """
         model = _get_embedding_model()
 
@@ -73,37 +239,85 @@ class EmbeddingService:
 
         try:
             embedding = model.encode(text, convert_to_numpy=True)
-            return embedding.tolist()
+            return np.asarray(embedding, dtype=np.float32)
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             return self._fallback_embedding(text)
 
-    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for multiple texts efficiently.
 
+        Embeddings are cached by a digest of the text, so repeated and
+        duplicate texts are only encoded once; the remaining misses are
+        encoded together in a single batch.
+
         Args:
             texts: List of texts to embed
 
         Returns:
-            List of embedding vectors
+            float32 array of shape (len(texts), dim), one embedding per row
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        keys = [hashlib.blake2b(text.encode(), digest_size=16).digest() for text in texts]
+        rows: List[Optional[np.ndarray]] = []
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            row = self._embedding_cache.get(key)
+            if row is not None:
+                self._embedding_cache.move_to_end(key)
+            else:
+                missing.setdefault(key, text)
+            rows.append(row)
+
+        if missing:
+            encoded, cacheable = self._encode_batch(list(missing.values()))
+            fresh = dict(zip(missing, encoded))
+            if cacheable:
+                for key, row in fresh.items():
+                    row.setflags(write=False)
+                    self._embedding_cache[key] = row
+                while len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                    self._embedding_cache.popitem(last=False)
+            rows = [fresh[key] if row is None else row for key, row in zip(keys, rows)]
+
+        return np.vstack(rows)
+
+    def _encode_batch(self, texts: List[str]) -> Tuple[np.ndarray, bool]:
+        """
+        Encode texts with the embedding model.
+
+        sentence-transformers already sorts inputs by length before batching
+        (so each batch pads to similar lengths) and restores the input order.
+        Model embeddings come back L2-normalized.
+
+        Returns:
+            Tuple of (float32 embeddings, whether they may be cached); results
+            of the fallback used after a model error are not cached
         """
         model = _get_embedding_model()
 
         if model == "fallback":
-            return [self._fallback_embedding(text) for text in texts]
+            return np.stack([self._fallback_embedding(text) for text in texts]), True
 
         try:
-            embeddings = model.encode(texts, convert_to_numpy=True)
-            return [emb.tolist() for emb in embeddings]
+            embeddings = model.encode(
+                texts,
+                batch_size=EMBEDDING_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            return np.asarray(embeddings, dtype=np.float32), True
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
-            return [self._fallback_embedding(text) for text in texts]
+            return np.stack([self._fallback_embedding(text) for text in texts]), False
 
     def calculate_similarity(
         self,
-        embedding1: List[float],
-        embedding2: List[float]
+        embedding1: np.ndarray,
+        embedding2: np.ndarray
     ) -> float:
         """
         Calculate cosine similarity between two embeddings.
@@ -116,19 +330,18 @@ class EmbeddingService:
             Cosine similarity score (-1 to 1, higher is more similar)
         """
         try:
-            import numpy as np
-
-            vec1 = np.array(embedding1)
-            vec2 = np.array(embedding2)
-
-            dot_product = np.dot(vec1, vec2)
-            norm1 = np.linalg.norm(vec1)
-            norm2 = np.linalg.norm(vec2)
-
-            if norm1 == 0 or norm2 == 0:
-                return 0.0
-
-            return float(dot_product / (norm1 * norm2))
+            # No copy for the float32 arrays get_embedding returns
+            vec1 = np.asarray(embedding1, dtype=np.float32)
+            vec2 = np.asarray(embedding2, dtype=np.float32)
+
+            simsimd = _get_simsimd()
+            if simsimd is not None:
+                # Fused dot + norms kernel; zero vectors are scored 0 as below
+                if not vec1.any() or not vec2.any():
+                    return 0.0
+                return 1.0 - float(simsimd.cosine(vec1, vec2))
+
+            return _cosine_dispatch(vec1, vec2)
         except ImportError:
             return self._fallback_similarity(embedding1, embedding2)
         except Exception as e:
@@ -155,17 +368,8 @@ class EmbeddingService:
         if not candidates:
             return []
 
-        query_embedding = self.get_embedding(query)
-        candidate_embeddings = self.get_embeddings(candidates)
-
-        similarities = []
-        for i, candidate_emb in enumerate(candidate_embeddings):
-            sim = self.calculate_similarity(query_embedding, candidate_emb)
-            similarities.append((candidates[i], sim))
-
-        # Sort by similarity descending
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:top_k]
+        sims = self._candidate_similarities(query, candidates)
+        return [(candidates[i], float(sims[i])) for i in _top_k(sims, top_k)]
 
     def find_similar_topics(
         self,
@@ -184,26 +388,163 @@ class EmbeddingService:
         Returns:
             List of dicts with topic and relevance score
         """
-        similar = self.find_similar(query, topic_list, top_k)
+        if not topic_list:
+            return []
+
+        sims = self._candidate_similarities(query, topic_list)
+        top = _top_k(sims, top_k)
+        # float64 first, so the rounded scores are the nearest doubles (e.g. 0.889)
+        scores = np.round(sims[top].astype(np.float64), 3).tolist()
         return [
-            {"topic": topic, "relevance_score": round(score, 3)}
-            for topic, score in similar
+            {"topic": topic_list[i], "relevance_score": score}
+            for i, score in zip(top, scores)
         ]
 
+    def _candidate_similarities(self, query: str, candidates: List[str]) -> np.ndarray:
+        """Cosine similarity of the query to every candidate, in one matrix-vector product."""
+        return _cosine_dispatch(self.get_embedding(query), self.get_embeddings(candidates))
+
     def index_lessons(self, lessons: List[Dict[str, Any]]) -> None:
         """
         Index lesson content for later similarity search.
 
+        Lessons are embedded in one batch, L2-normalized and stored as a
+        single contiguous int8 matrix (a quarter of the float32 size);
+        re-indexing an id replaces its row. If the embedding dimension has
+        changed since the index was built, the old index is dropped.
+
         Args:
             lessons: List of lesson dictionaries with 'id' and 'content'/'title' keys
         """
+        # Last entry wins when an id appears more than once
+        contents: Dict[str, str] = {}
         for lesson in lessons:
             lesson_id = str(lesson.get("id", ""))
             content = lesson.get("content", "") or lesson.get("title", "") or ""
             if lesson_id and content:
-                embedding = self.get_embedding(content)
-                self._lesson_embeddings[lesson_id] = embedding
-                logger.debug(f"Indexed lesson: {lesson_id}")
+                contents[lesson_id] = content
+        if not contents:
+            return
+
+        ids = list(contents)
+        vectors, scales = _quantize(_normalize(self.get_embeddings(list(contents.values()))))
+        self._lesson_bits = None
+        if self._lesson_matrix is not None and vectors.shape[1] != self._lesson_matrix.shape[1]:
+            # e.g. the model fell back after the index was built; old rows
+            # can't be compared with new ones, so start a fresh index
+            logger.warning(
+                f"Embedding dimension changed ({self._lesson_matrix.shape[1]} -> {vectors.shape[1]}); "
+                f"dropping {len(self._lesson_ids)} indexed lessons"
+            )
+            self._lesson_ids = []
+            self._lesson_rows = {}
+            self._lesson_matrix = None
+            self._lesson_scales = None
+
+        new_rows = []
+        for i, lesson_id in enumerate(ids):
+            row = self._lesson_rows.get(lesson_id)
+            if row is not None:
+                if not self._lesson_matrix.flags.writeable:
+                    # Loaded read-only from disk; copy before updating rows
+                    self._lesson_matrix = np.array(self._lesson_matrix)
+                self._lesson_matrix[row] = vectors[i]
+                self._lesson_scales[row] = scales[i]
+            else:
+                self._lesson_rows[lesson_id] = len(self._lesson_ids)
+                self._lesson_ids.append(lesson_id)
+                new_rows.append(i)
+            logger.debug(f"Indexed lesson: {lesson_id}")
+
+        if new_rows:
+            if self._lesson_matrix is None:
+                self._lesson_matrix = np.ascontiguousarray(vectors[new_rows])
+                self._lesson_scales = scales[new_rows]
+            else:
+                self._lesson_matrix = np.ascontiguousarray(np.vstack([self._lesson_matrix, vectors[new_rows]]))
+                self._lesson_scales = np.concatenate([self._lesson_scales, scales[new_rows]])
+
+    def add_lesson(self, lesson_id: str, content: str) -> None:
+        """
+        Index (or re-index) a single lesson.
+
+        Args:
+            lesson_id: Lesson identifier
+            content: Text to embed for the lesson
+        """
+        self.index_lessons([{"id": lesson_id, "content": content}])
+
+    def save_index(self, path: str) -> None:
+        """
+        Write the lesson index to `path` so later processes can skip re-embedding.
+
+        Args:
+            path: Directory to write the index files into
+        """
+        if self._lesson_matrix is None:
+            return
+
+        model = _get_embedding_model()
+        if model == "fallback":
+            logger.warning("Not saving lesson index built from fallback embeddings")
+            return
+
+        directory = Path(path)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / LESSON_MATRIX_FILE, self._lesson_matrix)
+        np.save(directory / LESSON_SCALES_FILE, self._lesson_scales)
+        (directory / LESSON_IDS_FILE).write_text(json.dumps({
+            "model": get_ai_settings().embedding_model_name,
+            "dim": int(self._lesson_matrix.shape[1]),
+            "ids": self._lesson_ids
+        }))
+        logger.info(f"Saved lesson index ({len(self._lesson_ids)} lessons) to {directory}")
+
+    def load_index(self, path: str) -> bool:
+        """
+        Load a lesson index written by save_index.
+
+        The matrix is memory-mapped read-only, so the OS pages it in on
+        demand. Indexes built with a different embedding model or dimension
+        are ignored.
+
+        Args:
+            path: Directory containing the index files
+
+        Returns:
+            True if an index was loaded
+        """
+        directory = Path(path)
+        try:
+            header = json.loads((directory / LESSON_IDS_FILE).read_text())
+            if header.get("model") != get_ai_settings().embedding_model_name:
+                logger.info("Saved lesson index was built with another model; ignoring it")
+                return False
+
+            matrix = np.load(directory / LESSON_MATRIX_FILE, mmap_mode="r")
+            scales = np.load(directory / LESSON_SCALES_FILE)
+            ids = [str(lesson_id) for lesson_id in header.get("ids", [])]
+            if (
+                matrix.ndim != 2
+                or matrix.shape[1] != header.get("dim")
+                or len(ids) != matrix.shape[0]
+                or scales.shape != (len(ids),)
+            ):
+                logger.warning(f"Saved lesson index in {directory} is inconsistent; ignoring it")
+                return False
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.error(f"Failed to load lesson index: {e}")
+            return False
+
+        self._lesson_ids = ids
+        self._lesson_rows = {lesson_id: i for i, lesson_id in enumerate(ids)}
+        self._lesson_matrix = matrix
+        self._lesson_scales = scales
+        self._lesson_bits = None
+        logger.info(f"Loaded lesson index ({len(ids)} lessons) from {directory}")
+        return True
 
     def search_lessons(
         self,
@@ -213,6 +554,11 @@ class EmbeddingService:
         """
         Search indexed lessons by semantic similarity.
 
+        Large indexes are searched in two stages: the sign bits of every
+        lesson are compared with the query's by Hamming distance (an
+        eighth of the int8 matrix's memory traffic), and only the closest
+        BINARY_RERANK_FACTOR * top_k lessons are scored exactly.
+
         Args:
             query: Search query
             top_k: Number of results to return
@@ -220,18 +566,39 @@ class EmbeddingService:
         Returns:
             List of (lesson_id, similarity_score) tuples
         """
-        if not self._lesson_embeddings:
+        if self._lesson_matrix is None:
             return []
 
-        query_embedding = self.get_embedding(query)
-
-        results = []
-        for lesson_id, lesson_emb in self._lesson_embeddings.items():
-            sim = self.calculate_similarity(query_embedding, lesson_emb)
-            results.append((lesson_id, sim))
+        query_vec = _normalize(self.get_embedding(query))
+        query_i8, query_scale = _quantize(query_vec)
+        if query_i8.shape[0] != self._lesson_matrix.shape[1]:
+            # e.g. the model fell back after the index was built
+            logger.warning("Query embedding dimension does not match the lesson index")
+            return []
 
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:top_k]
+        rows = None
+        shortlist = BINARY_RERANK_FACTOR * top_k
+        if len(self._lesson_ids) >= BINARY_SHORTLIST_MIN_LESSONS and shortlist < len(self._lesson_ids):
+            query_bits = np.packbits(query_i8 > 0)
+            distances = _POPCOUNT_U8[self._get_lesson_bits() ^ query_bits].sum(axis=1, dtype=np.int32)
+            rows = _top_k(-distances, shortlist)
+
+        matrix = self._lesson_matrix if rows is None else self._lesson_matrix[rows]
+        scales = self._lesson_scales if rows is None else self._lesson_scales[rows]
+
+        # Rows are already normalized, so the rescaled integer dot product
+        # approximates every cosine in one matrix-vector product
+        dots = matrix @ query_i8.astype(np.int32)
+        sims = dots * (scales * query_scale)
+        best = _top_k(sims, top_k)
+        ids = best if rows is None else rows[best]
+        return [(self._lesson_ids[i], float(s)) for i, s in zip(ids, sims[best])]
+
+    def _get_lesson_bits(self) -> np.ndarray:
+        """Sign bits of the lesson matrix, packed row-wise (rebuilt after the index changes)."""
+        if self._lesson_bits is None:
+            self._lesson_bits = np.packbits(self._lesson_matrix > 0, axis=1)
+        return self._lesson_bits
 
     def match_patterns_to_lessons(
         self,
@@ -254,11 +621,14 @@ class EmbeddingService:
         # Combine patterns into a query
         pattern_text = " ".join(patterns)
 
-        # Get lesson contents/titles for comparison
+        # Get lesson contents/titles for comparison, and map them back to
+        # lesson objects (later lessons win for duplicate content)
         lesson_contents = []
+        content_to_lesson = {}
         for lesson in available_lessons:
             content = lesson.get("description", "") or lesson.get("title", "") or ""
             lesson_contents.append(content)
+            content_to_lesson[content] = lesson
 
         if not lesson_contents:
             return []
@@ -266,22 +636,13 @@ class EmbeddingService:
         # Find similar lessons
         similar = self.find_similar(pattern_text, lesson_contents, top_k=5)
 
-        # Map back to lesson objects
-        content_to_lesson = {}
-        for lesson in available_lessons:
-            content = lesson.get("description", "") or lesson.get("title", "") or ""
-            content_to_lesson[content] = lesson
-
-        result = []
-        for content, score in similar:
-            if content in content_to_lesson:
-                lesson = content_to_lesson[content].copy()
-                lesson["relevance_score"] = round(score, 3)
-                result.append(lesson)
-
-        return result
+        return [
+            {**content_to_lesson[content], "relevance_score": round(score, 3)}
+            for content, score in similar
+            if content in content_to_lesson
+        ]
 
-    def _fallback_embedding(self, text: str) -> List[float]:
+    def _fallback_embedding(self, text: str) -> np.ndarray:
         """
         Generate a simple fallback embedding when model is unavailable.
 
@@ -292,30 +653,26 @@ class EmbeddingService:
             text: Text to embed
 
         Returns:
-            List of floats representing a basic embedding
+            float32 vector representing a basic embedding
         """
-        import hashlib
-
         # Create a deterministic but simple embedding
         text_lower = text.lower()
 
-        # Generate 64-dimensional embedding based on text features
-        embedding = []
-
-        # Character frequency features (26 dimensions for a-z)
-        for char in 'abcdefghijklmnopqrstuvwxyz':
-            embedding.append(text_lower.count(char) / max(len(text), 1))
+        # Character frequency features (26 dimensions for a-z), counted in
+        # one pass over the ASCII bytes
+        letters = np.frombuffer(text_lower.encode("ascii", "ignore"), dtype=np.uint8)
+        char_freq = np.bincount(letters, minlength=128)[97:123] / max(len(text), 1)
 
         # Word count features
         words = text_lower.split()
-        embedding.append(len(words) / 100)  # Normalized word count
+        word_count = np.array([len(words) / 100])  # Normalized word count
 
-        # Hash-based features for remaining dimensions
-        hash_bytes = hashlib.md5(text.encode()).digest()
-        for byte in hash_bytes[:37]:  # 37 more dimensions
-            embedding.append(byte / 255)
+        # Hash-based features for remaining dimensions (16 bytes, as before
+        # with md5; a fingerprint only, so the faster blake2b is enough)
+        hash_bytes = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        hash_features = np.frombuffer(hash_bytes, dtype=np.uint8) / 255
 
-        return embedding
+        return np.concatenate((char_freq, word_count, hash_features)).astype(np.float32)
 
     def _fallback_similarity(
         self,
@@ -335,18 +692,28 @@ class EmbeddingService:
         if len(embedding1) != len(embedding2):
             return 0.0
 
-        dot_product = sum(a * b for a, b in zip(embedding1, embedding2))
-        norm1 = sum(a * a for a in embedding1) ** 0.5
-        norm2 = sum(b * b for b in embedding2) ** 0.5
+        # Dot product and both squared norms in a single pass
+        dot_product = sq_norm1 = sq_norm2 = 0.0
+        for a, b in zip(embedding1, embedding2):
+            dot_product += a * b
+            sq_norm1 += a * a
+            sq_norm2 += b * b
 
-        if norm1 == 0 or norm2 == 0:
+        if sq_norm1 == 0 or sq_norm2 == 0:
             return 0.0
 
-        return dot_product / (norm1 * norm2)
+        return dot_product / (sq_norm1 ** 0.5 * sq_norm2 ** 0.5)
+
+
+def get_lesson_index_dir() -> str:
+    """Directory where the lesson index is saved, next to the model cache."""
+    return str(Path(get_ai_settings().embedding_cache_dir) / "lesson_index")
 
 
-# Singleton instance
-_embedding_service: Optional[EmbeddingService] = None
+# Singleton instance, created at import (the model itself still loads lazily).
+# A previously saved lesson index is memory-mapped rather than re-embedded.
+_embedding_service: EmbeddingService = EmbeddingService()
+_embedding_service.load_index(get_lesson_index_dir())
 
 def get_embedding_service() -> EmbeddingService:
     """
@@ -355,9 +722,6 @@ def get_embedding_service() -> EmbeddingService:
     Returns:
         EmbeddingService instance
     """
-    global _embedding_service
-    if _embedding_service is None:
-        _embedding_service = EmbeddingService()
     return _embedding_service
 
 
@@ -365,4 +729,4 @@ def get_embedding_service() -> EmbeddingService:
 if __name__ == "__main__":
     embeddings = get_embedding_service()
     result = embeddings.get_embedding("What is RSI?")
-    print(result)
\ No newline at end of file
+    print(result.tolist())
\ No newline at end of file
@@ -4,7 +4,12 @@ Trading Chatbot Service
 Uses Anthropic Claude API to provide conversational trading assistance.
 Maintains conversation history and context for coherent multi-turn dialogues.
 """
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+import re
+import threading
 import uuid
 from app.services.ai.llm.chat.chat_prompts import (
     CHAT_SYSTEM_PROMPT,
@@ -14,9 +19,79 @@ from app.services.ai.llm.chat.chat_prompts import (
 )
 from app.services.ai.llm.chat.typings import ChatSession
 from app.services.ai.llm.connector import LLMConnector
+from app.services.ai.llm.prompt import PreparedPrompt
 from app.services.logger.logger import logger
 from app.database.model import users as UserModels
 
+# Templates are parsed once here rather than on every `.format()` call
+_SYSTEM_PROMPT = PreparedPrompt(CHAT_SYSTEM_PROMPT)
+_CONTEXT_PROMPT = PreparedPrompt(CONTEXT_BUILDING_TEMPLATE)
+
+
+def _keyword_pattern(keywords: List[str]) -> "re.Pattern[str]":
+    """Compile a list of keywords into a single substring-matching alternation."""
+    return re.compile("|".join(re.escape(kw) for kw in keywords))
+
+
+# Greetings
+_GREETINGS = ["hi", "hello", "hey", "good morning", "good afternoon", "good evening", "howdy"]
+
+# Capability questions
+_CAPABILITY_KEYWORDS = ["what can you do", "help me", "how can you help", "your capabilities", "what are you"]
+
+# Goodbye
+_GOODBYE_KEYWORDS = ["bye", "goodbye", "see you", "thanks bye", "thank you bye"]
+
+# Off-topic questions (weather, sports, entertainment, etc.)
+_OFF_TOPIC_KEYWORDS = [
+    "weather", "sports", "movie", "music", "food", "recipe",
+    "joke", "game", "celebrity", "politics", "news", "netflix",
+    "football", "basketball", "soccer", "concert", "party",
+    "restaurant", "travel", "vacation", "holiday"
+]
+
+# Compiled once at import; checked in order against the lowercased message.
+# Greetings must be the whole message or be followed by a space or comma,
+# so that check is anchored and rejects most messages after a few chars.
+_GREETING_PATTERN = re.compile(f"^(?:{_keyword_pattern(_GREETINGS).pattern})(?:$|[ ,])")
+
+# The keyword categories, highest priority first, share one scan. The
+# lookahead lets a match start at every position, and at any position the
+# earlier (higher-priority) category wins, so the result is the same as
+# checking each category in turn.
+_KEYWORD_PRIORITY = ["capabilities", "goodbye", "off_topic"]
+_KEYWORD_PATTERN = re.compile("(?=(?:" + "|".join(
+    f"(?P<{key}>{_keyword_pattern(keywords).pattern})"
+    for key, keywords in zip(_KEYWORD_PRIORITY, [_CAPABILITY_KEYWORDS, _GOODBYE_KEYWORDS, _OFF_TOPIC_KEYWORDS])
+) + "))")
+
+
+CHAT_ERROR_MESSAGE = "I apologize, but I am unable to process your request at the moment. Please ensure the AI service is correctly configured."
+
+
+def _normalize(message: str) -> str:
+    """Normalise a chat message for quick-response matching."""
+    return message.lower().strip()
+
+
+@lru_cache(maxsize=4096)
+def _quick_response_cached(message_lower: str) -> Optional[str]:
+    """Quick response for a normalised message; repeat phrasings are a dict hit."""
+    if _GREETING_PATTERN.search(message_lower):
+        return QUICK_RESPONSES["greeting"]
+
+    best = len(_KEYWORD_PRIORITY)
+    for match in _KEYWORD_PATTERN.finditer(message_lower):
+        rank = _KEYWORD_PRIORITY.index(match.lastgroup)
+        if rank < best:
+            best = rank
+            if rank == 0:
+                break
+
+    if best < len(_KEYWORD_PRIORITY):
+        return QUICK_RESPONSES[_KEYWORD_PRIORITY[best]]
+    return None
+
 class TradingChatBot(LLMConnector):
     """
     AI-powered trading assistant chatbot.
@@ -28,7 +103,9 @@ class TradingChatBot(LLMConnector):
     def __init__(self):
         """Initialize the chatbot with Anthropic client."""
         super().__init__()
-        self._sessions: Dict[str, ChatSession] = {}
+        # Least recently used sessions are evicted past chat_max_sessions
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
 
     def get_or_create_session(
         self,
@@ -47,8 +124,12 @@ class TradingChatBot(LLMConnector):
         Returns:
             ChatSession instance
         """
-        if session_id and session_id in self._sessions:
-            return self._sessions[session_id]
+        if session_id:
+            with self._sessions_lock:
+                existing = self._sessions.get(session_id)
+                if existing is not None:
+                    self._sessions.move_to_end(session_id)
+                    return existing
 
         # Create new session
         new_session_id = session_id or str(uuid.uuid4())
@@ -96,7 +177,7 @@ class TradingChatBot(LLMConnector):
                     trade_lines.append(f"- {result} ({pnl})")
                 recent_trades_str = "\n".join(trade_lines)
 
-            context_str = CONTEXT_BUILDING_TEMPLATE.format(
+            context_str = _CONTEXT_PROMPT.render(
                 # Questionnaire preferences
                 experience_level=experience_level,
                 capital_allocation=capital_allocation,
@@ -119,9 +200,22 @@ class TradingChatBot(LLMConnector):
         session = ChatSession(
             session_id=new_session_id,
             user_id=user_id,
-            user_context=context_str
+            user_context=context_str,
+            # The context is fixed for the session, so the system prompt is too
+            system_prompt=_SYSTEM_PROMPT.render(
+                user_context=context_str or "No specific context available."
+            )
         )
-        self._sessions[new_session_id] = session
+        with self._sessions_lock:
+            # Another request may have created the same session meanwhile
+            existing = self._sessions.get(new_session_id)
+            if existing is not None:
+                self._sessions.move_to_end(new_session_id)
+                return existing
+
+            self._sessions[new_session_id] = session
+            while len(self._sessions) > self._settings.chat_max_sessions:
+                self._sessions.popitem(last=False)
         return session
 
     async def chat(
@@ -143,6 +237,84 @@ class TradingChatBot(LLMConnector):
         Returns:
             Tuple of (response, session_id)
         """
+        session, system_prompt, max_tokens = await self._prepare_turn(
+            session_id, user_id, message, user_context
+        )
+
+        if self._get_client():
+            try:
+                response = await self._call_llm(
+                    system_prompt=system_prompt,
+                    messages=session.get_messages_for_api(),
+                    max_tokens=max_tokens
+                )
+                session.add_message("assistant", response)
+                return response, session.session_id
+            except Exception as e:
+                logger.error(f"Error in chat: {e}")
+
+        # Error response (Fallbacks removed)
+        session.add_message("assistant", CHAT_ERROR_MESSAGE)
+        return CHAT_ERROR_MESSAGE, session.session_id
+
+    async def chat_stream(
+        self,
+        session_id: Optional[str],
+        user_id: int,
+        message: str,
+        user_context: Optional[Dict[str, Any]] = None
+    ) -> tuple[str, AsyncIterator[str]]:
+        """
+        Process a chat message and stream the response as it is generated.
+
+        Takes the same arguments as chat. The session is resolved up front so
+        the caller knows the session ID before the first token arrives; the
+        full response is added to the session history once streaming ends.
+
+        Returns:
+            Tuple of (session_id, async iterator of response text chunks)
+        """
+        session, system_prompt, max_tokens = await self._prepare_turn(
+            session_id, user_id, message, user_context
+        )
+
+        async def chunks() -> AsyncIterator[str]:
+            if self._get_client():
+                parts = []
+                try:
+                    async for text in self._stream_llm(
+                        system_prompt=system_prompt,
+                        messages=session.get_messages_for_api(),
+                        max_tokens=max_tokens
+                    ):
+                        parts.append(text)
+                        yield text
+                    session.add_message("assistant", "".join(parts))
+                    return
+                except Exception as e:
+                    logger.error(f"Error in chat stream: {e}")
+                    if parts:
+                        session.add_message("assistant", "".join(parts))
+                        return
+
+            session.add_message("assistant", CHAT_ERROR_MESSAGE)
+            yield CHAT_ERROR_MESSAGE
+
+        return session.session_id, chunks()
+
+    async def _prepare_turn(
+        self,
+        session_id: Optional[str],
+        user_id: int,
+        message: str,
+        user_context: Optional[Dict[str, Any]]
+    ) -> tuple[ChatSession, str, int]:
+        """
+        Resolve the session, record the user message and build the request.
+
+        Returns:
+            Tuple of (session, system prompt, max tokens)
+        """
         # Fetch market context from Deriv API
         if user_context is None:
             user_context = {}
@@ -188,10 +360,8 @@ class TradingChatBot(LLMConnector):
         #     session.add_message("assistant", quick_response)
         #     return quick_response, session.session_id
 
-        # Build system prompt with user context
-        system_prompt = CHAT_SYSTEM_PROMPT.format(
-            user_context=session.user_context or "No specific context available."
-        )
+        # System prompt with user context, built once per session
+        system_prompt = session.system_prompt
 
         # Determine constraints based on message type
         message_type = user_context.get("message_type", "general")
@@ -201,54 +371,11 @@ class TradingChatBot(LLMConnector):
             max_tokens = 175  # Approx 150 words constraint
             system_prompt += "\n\nCRITICAL INSTRUCTION: Respond in 150 words or less. Be concise."
 
-        self._client = self._get_client()
-        if self._client:
-            try:
-                response = await self._call_llm(
-                    system_prompt=system_prompt,
-                    messages=session.get_messages_for_api(),
-                    max_tokens=max_tokens
-                )
-                session.add_message("assistant", response)
-                return response, session.session_id
-            except Exception as e:
-                logger.error(f"Error in chat: {e}")
-
-        # Error response (Fallbacks removed)
-        error_msg = "I apologize, but I am unable to process your request at the moment. Please ensure the AI service is correctly configured."
-        session.add_message("assistant", error_msg)
-        return error_msg, session.session_id
+        return session, system_prompt, max_tokens
 
     def _check_quick_response(self, message: str) -> Optional[str]:
         """Check if message matches a quick response pattern."""
-        message_lower = message.lower().strip()
-
-        # Greetings
-        greetings = ["hi", "hello", "hey", "good morning", "good afternoon", "good evening", "howdy"]
-        if any(message_lower == g or message_lower.startswith(g + " ") or message_lower.startswith(g + ",") for g in greetings):
-            return QUICK_RESPONSES["greeting"]
-
-        # Capability questions
-        capability_keywords = ["what can you do", "help me", "how can you help", "your capabilities", "what are you"]
-        if any(kw in message_lower for kw in capability_keywords):
-            return QUICK_RESPONSES["capabilities"]
-
-        # Goodbye
-        goodbye_keywords = ["bye", "goodbye", "see you", "thanks bye", "thank you bye"]
-        if any(kw in message_lower for kw in goodbye_keywords):
-            return QUICK_RESPONSES["goodbye"]
-
-        # Off-topic questions (weather, sports, entertainment, etc.)
-        off_topic_keywords = [
-            "weather", "sports", "movie", "music", "food", "recipe",
-            "joke", "game", "celebrity", "politics", "news", "netflix",
-            "football", "basketball", "soccer", "concert", "party",
-            "restaurant", "travel", "vacation", "holiday"
-        ]
-        if any(kw in message_lower for kw in off_topic_keywords):
-            return QUICK_RESPONSES["off_topic"]
-
-        return None
+        return _quick_response_cached(_normalize(message))
 
     def clear_session(self, session_id: str) -> bool:
         """
@@ -260,10 +387,8 @@ class TradingChatBot(LLMConnector):
         Returns:
             True if session was cleared, False if not found
         """
-        if session_id in self._sessions:
-            del self._sessions[session_id]
-            return True
-        return False
+        with self._sessions_lock:
+            return self._sessions.pop(session_id, None) is not None
 
     def get_session_history(self, session_id: str) -> List[Dict[str, Any]]:
         """
@@ -281,7 +406,7 @@ class TradingChatBot(LLMConnector):
                 {
                     "role": m.role,
                     "content": m.content,
-                    "timestamp": m.timestamp.isoformat()
+                    "timestamp": datetime.fromtimestamp(m.timestamp).isoformat()
                 }
                 for m in session.messages
             ]
@@ -289,11 +414,14 @@ class TradingChatBot(LLMConnector):
 
 # Singleton instance
 _chatbot: Optional[TradingChatBot] = None
+_chatbot_lock = threading.Lock()
 def get_chatbot() -> TradingChatBot:
     """Get the singleton chatbot instance."""
     global _chatbot
     if _chatbot is None:
-        _chatbot = TradingChatBot()
+        with _chatbot_lock:
+            if _chatbot is None:
+                _chatbot = TradingChatBot()
     return _chatbot
 
 # Example usage:
@@ -1,33 +1,48 @@
 
+from collections import deque
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Dict, List
+from itertools import islice
+from typing import Deque, Dict, List
+import time
 
+# Oldest messages are dropped once a session holds this many
+MAX_SESSION_MESSAGES = 200
 
-@dataclass
+
+@dataclass(slots=True)
 class ChatMessage:
     """A single chat message."""
     role: str  # "user" or "assistant"
     content: str
-    timestamp: datetime = field(default_factory=datetime.now)
+    timestamp: float = field(default_factory=time.time)  # Unix seconds
+    # Message in Anthropic API format, built once instead of every turn
+    api_dict: Dict[str, str] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.api_dict = {"role": self.role, "content": self.content}
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatSession:
     """A chat session with history."""
     session_id: str
     user_id: int
-    messages: List[ChatMessage] = field(default_factory=list)
+    messages: Deque[ChatMessage] = field(default_factory=lambda: deque(maxlen=MAX_SESSION_MESSAGES))
     user_context: str = ""
-    created_at: datetime = field(default_factory=datetime.now)
+    system_prompt: str = ""
+    created_at: float = field(default_factory=time.time)  # Unix seconds
 
     def add_message(self, role: str, content: str) -> None:
         """Add a message to the session."""
         self.messages.append(ChatMessage(role=role, content=content))
 
+    def _recent(self, max_messages: int):
+        """Iterate over the last `max_messages` messages."""
+        return islice(self.messages, max(0, len(self.messages) - max_messages), None)
+
     def get_history_text(self, max_messages: int = 10) -> str:
         """Get formatted conversation history."""
-        recent = self.messages[-max_messages:]
+        recent = self._recent(max_messages)
         return "\n".join(
             f"{m.role.capitalize()}: {m.content}"
             for m in recent
@@ -35,6 +50,5 @@ class ChatSession:
 
     def get_messages_for_api(self, max_messages: int = 10) -> List[Dict[str, str]]:
         """Get messages formatted for API call."""
-        recent = self.messages[-max_messages:]
-        return [{"role": m.role, "content": m.content} for m in recent]
+        return [m.api_dict for m in self._recent(max_messages)]
 
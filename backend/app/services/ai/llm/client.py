@@ -0,0 +1,62 @@
+"""
+Shared Anthropic Client
+
+One AsyncAnthropic instance is shared by every LLM service and router so
+that all Claude requests reuse the same pooled httpx connections instead
+of paying a fresh TCP/TLS handshake per client. Call
+`close_anthropic_client()` on application shutdown.
+
+The client keeps the SDK's default timeout; calls that generate long
+completions pass `timeout=llm_timeout(max_tokens)` so the limit scales
+with the output they ask for.
+"""
+from typing import Optional
+import threading
+
+import anthropic
+import httpx
+
+from app.config.ai import get_ai_settings
+
+# Connection pool for the shared client. Idle connections are kept for a
+# minute (httpx defaults to 5 s) so sporadic requests skip the TLS handshake
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=60.0)
+
+# Slowest generation rate a completion is allowed before it times out
+LLM_MIN_TOKENS_PER_SECOND = 40
+
+_client: Optional[anthropic.AsyncAnthropic] = None
+_client_lock = threading.Lock()
+
+def get_anthropic_client() -> anthropic.AsyncAnthropic:
+    """Get the process-wide AsyncAnthropic client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                settings = get_ai_settings()
+                _client = anthropic.AsyncAnthropic(
+                    api_key=settings.anthropic_api_key,
+                    max_retries=settings.anthropic_max_retries,
+                    http_client=anthropic.DefaultAsyncHttpxClient(limits=HTTP_LIMITS)
+                )
+    return _client
+
+
+def llm_timeout(max_tokens: int) -> httpx.Timeout:
+    """
+    Request timeout for a non-streaming completion of up to `max_tokens`.
+
+    AI_REQUEST_TIMEOUT covers request overhead and time to first token;
+    the rest allows for generating `max_tokens` at LLM_MIN_TOKENS_PER_SECOND.
+    """
+    total = get_ai_settings().request_timeout + max_tokens / LLM_MIN_TOKENS_PER_SECOND
+    return httpx.Timeout(total, connect=5.0)
+
+
+async def close_anthropic_client() -> None:
+    """Close the shared client's connection pool, if it was ever created."""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.close()
@@ -4,14 +4,15 @@ Trading Chatbot Service
 Uses Anthropic Claude API to provide conversational trading assistance.
 Maintains conversation history and context for coherent multi-turn dialogues.
 """
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Optional
+import httpx
 from app.services.analysis.analysis import get_analysis_service
 from app.services.deriv.deriv import get_deriv_service
 from app.services.logger.logger import logger
 from app.config.ai import get_ai_settings
 from app.config.db import get_db
-import anthropic
-import asyncio
+from app.services.ai.llm.client import get_anthropic_client, close_anthropic_client
+import threading
 
 class LLMConnector:
     """
@@ -25,40 +26,67 @@ class LLMConnector:
         self._deriv_service = get_deriv_service()
         self._analysis_service = get_analysis_service()
         self._client = None
+        self._client_lock = threading.Lock()
 
     def _get_client(self):
-        """Load the Anthropic client."""
-        if self._client is None:
-            if not self._settings.is_anthropic_configured():
-                logger.warning("Anthropic API key not configured. AI features will be unavailable.")
-                return None
-            try:
-                self._client = anthropic.Anthropic(api_key=self._settings.anthropic_api_key)
-            except ImportError:
-                logger.error("Anthropic package not installed.")
-                return None
-            except Exception as e:
-                logger.error(f"Failed to initialize Anthropic client: {e}")
-                return None
+        """Load the Anthropic client (created once, safe under concurrent first use)."""
+        if self._client is not None:
+            return self._client
+
+        with self._client_lock:
+            if self._client is None:
+                if not self._settings.is_anthropic_configured():
+                    logger.warning("Anthropic API key not configured. AI features will be unavailable.")
+                    return None
+                try:
+                    self._client = get_anthropic_client()
+                except Exception as e:
+                    logger.error("Failed to initialize Anthropic client: %s", e)
+                    return None
         return self._client
 
+    async def aclose(self):
+        """Release the shared Anthropic client's connections (call on shutdown)."""
+        self._client = None
+        await close_anthropic_client()
+
     async def _call_llm(
         self,
         system_prompt: str,
         messages: List[Dict[str, str]],
-        max_tokens: int = 1024
+        max_tokens: int = 1024,
+        timeout: Optional[httpx.Timeout] = None
     ) -> str:
-        """Make API call to Anthropic Claude."""
+        """
+        Make API call to Anthropic Claude.
 
-        def _sync_call():
-            client = self._get_client()
-            response = client.messages.create(
-                model=self._settings.anthropic_model_name,
-                max_tokens=max_tokens,
-                system=system_prompt,
-                messages=messages
-            )
-            return response.content[0].text
+        Pass `timeout` (see llm_timeout) for long completions; otherwise the
+        client's default applies.
+        """
+        client = self._client or self._get_client()
+        kwargs = {"timeout": timeout} if timeout is not None else {}
+        response = await client.messages.create(
+            model=self._settings.anthropic_model_name,
+            max_tokens=max_tokens,
+            system=system_prompt,
+            messages=messages,
+            **kwargs
+        )
+        return response.content[0].text
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _sync_call)
\ No newline at end of file
+    async def _stream_llm(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 1024
+    ) -> AsyncIterator[str]:
+        """Stream an Anthropic Claude response, yielding text chunks as they arrive."""
+        client = self._client or self._get_client()
+        async with client.messages.stream(
+            model=self._settings.anthropic_model_name,
+            max_tokens=max_tokens,
+            system=system_prompt,
+            messages=messages
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
@@ -4,24 +4,85 @@ Educational Content Generator Service
 Uses Anthropic Claude API to generate personalized trading lessons
 based on user skill level, trading patterns, and identified weaknesses.
 """
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, Tuple
+from functools import lru_cache
+import asyncio
+import hashlib
 import json
+import threading
+import httpx
 from app.services.logger.logger import logger
+from app.services.cache.cache import TTLCache
 from app.services.ai.embeddings.embeddings import get_embedding_service
 from app.services.ai.llm.education.education_prompts import (
     EDUCATION_SYSTEM_PROMPT,
     LESSON_GENERATION_TEMPLATE,
+    LESSON_BATCH_TEMPLATE,
+    LESSON_BATCH_ITEM_TEMPLATE,
     TOPIC_SUGGESTION_TEMPLATE
 )
+from app.services.ai.llm.client import llm_timeout
 from app.services.ai.llm.connector import LLMConnector
+from app.services.ai.llm.parsing import JsonArrayStreamParser, extract_json
+from app.services.ai.llm.prompt import PreparedPrompt
 from app.services.ai.llm.education.typings import (
     GeneratedLesson,
+    LessonRequest,
     LessonSection,
     QuizQuestion,
     TopicSuggestion
 )
 from app.database.model import users as UserModels
 
+# Templates are parsed once here rather than on every `.format()` call
+_LESSON_PROMPT = PreparedPrompt(LESSON_GENERATION_TEMPLATE)
+_TOPIC_PROMPT = PreparedPrompt(TOPIC_SUGGESTION_TEMPLATE)
+_LESSON_BATCH_PROMPT = PreparedPrompt(LESSON_BATCH_TEMPLATE)
+_LESSON_BATCH_ITEM_PROMPT = PreparedPrompt(LESSON_BATCH_ITEM_TEMPLATE)
+
+# Max lessons requested per batched Claude call
+LESSON_BATCH_SIZE = 4
+
+@lru_cache(maxsize=1024, typed=True)
+def _render_lesson_prompt(
+    topic: str,
+    skill_level: str,
+    instruments: Tuple[str, ...],
+    weakness: str,
+    performance_summary: str,
+    length: str,
+    include_examples: bool
+) -> str:
+    """Render the lesson prompt; repeat requests for the same lesson reuse the string."""
+    return _LESSON_PROMPT.render(
+        skill_level=skill_level,
+        instruments=", ".join(instruments),
+        weakness=weakness,
+        performance_summary=performance_summary,
+        topic=topic,
+        length=length,
+        include_examples=str(include_examples).lower()
+    )
+
+
+@lru_cache(maxsize=1024, typed=True)
+def _render_topics_prompt(
+    skill_level: str,
+    instruments: Tuple[str, ...],
+    win_rate: float,
+    patterns: Tuple[str, ...],
+    completed_lessons: Tuple[str, ...]
+) -> str:
+    """Render the topic suggestion prompt, reusing the string for repeat profiles."""
+    return _TOPIC_PROMPT.render(
+        skill_level=skill_level,
+        instruments=", ".join(instruments) if instruments else "various",
+        win_rate=win_rate,
+        patterns=", ".join(patterns) if patterns else "none detected",
+        completed_lessons=", ".join(completed_lessons) if completed_lessons else "none"
+    )
+
+
 class EducationGenerator(LLMConnector):
     """
     Generates personalized educational content using Anthropic Claude.
@@ -34,6 +95,8 @@ class EducationGenerator(LLMConnector):
         """Initialize the education generator with Anthropic client."""
         super().__init__()
         self.embedding_service = get_embedding_service()
+        self._response_cache = TTLCache(ttl=self._settings.llm_cache_ttl)
+        self._llm_semaphore = asyncio.Semaphore(self._settings.anthropic_concurrency)
 
     async def generate_lesson(
         self,
@@ -60,12 +123,8 @@ class EducationGenerator(LLMConnector):
         Returns:
             GeneratedLesson with full content
         """
-        try:
-            user = self._db.query(UserModels.User).filter(UserModels.User.id == user_id).first()
-            if user:
-                skill_level = user.experience_level or "beginner"
-        except Exception as e:
-                logger.error(f"Error fetching user profile: {e}")
+        skill_level = self._get_skill_level(user_id)
+        cache_ttl = self._lesson_cache_ttl(performance_summary)
 
         instruments = instruments or ["general"]
         weakness = weakness or "general improvement"
@@ -76,7 +135,8 @@ class EducationGenerator(LLMConnector):
             try:
                 response = await self._get_lesson(
                     topic, skill_level, instruments, weakness,
-                    performance_summary, length, include_examples
+                    performance_summary, length, include_examples,
+                    cache_ttl=cache_ttl
                 )
                 return self._parse_lesson_response(response, skill_level)
             except Exception as e:
@@ -99,6 +159,215 @@ class EducationGenerator(LLMConnector):
             next_topics=[]
         )
 
+    async def generate_many(
+        self,
+        user_id: int,
+        topics: List[str],
+        **kwargs
+    ) -> List[GeneratedLesson]:
+        """
+        Generate lessons for several topics concurrently.
+
+        Lessons are requested in parallel, with at most
+        `anthropic_concurrency` calls in flight at once.
+
+        Args:
+            user_id: The user the lessons are for
+            topics: Lesson topics, one lesson per topic
+            **kwargs: Extra arguments passed to generate_lesson
+
+        Returns:
+            GeneratedLesson objects in the same order as topics
+        """
+        async def _generate(topic: str) -> GeneratedLesson:
+            async with self._llm_semaphore:
+                return await self.generate_lesson(user_id, topic, **kwargs)
+
+        return await asyncio.gather(*(_generate(topic) for topic in topics))
+
+    async def generate_lessons_batch(
+        self,
+        user_id: int,
+        requests: List[LessonRequest]
+    ) -> List[GeneratedLesson]:
+        """
+        Generate several lessons with batched Claude calls.
+
+        Requests are grouped into batches of up to LESSON_BATCH_SIZE that
+        share one system prompt and template preamble, so a batch costs far
+        fewer input tokens than calling generate_lesson for each. Any lesson
+        missing or malformed in a batch response is regenerated individually
+        with generate_lesson.
+
+        Args:
+            user_id: The user the lessons are for
+            requests: Parameters for each lesson
+
+        Returns:
+            GeneratedLesson objects in the same order as requests
+        """
+        if len(requests) <= 1:
+            return [await self.generate_lesson(user_id, **self._request_kwargs(r)) for r in requests]
+
+        skill_level = self._get_skill_level(user_id)
+        lessons: List[Optional[GeneratedLesson]] = [None] * len(requests)
+
+        if self._get_client():
+            starts = range(0, len(requests), LESSON_BATCH_SIZE)
+            batches = await asyncio.gather(*(
+                self._generate_lesson_batch(skill_level, requests[j:j + LESSON_BATCH_SIZE])
+                for j in starts
+            ))
+            for j, batch in zip(starts, batches):
+                lessons[j:j + len(batch)] = batch
+
+        missing = [i for i, lesson in enumerate(lessons) if lesson is None]
+        if missing:
+            logger.warning(f"Lesson batch incomplete, generating {len(missing)} lesson(s) individually")
+
+            async def _generate(request: LessonRequest) -> GeneratedLesson:
+                async with self._llm_semaphore:
+                    return await self.generate_lesson(user_id, **self._request_kwargs(request))
+
+            results = await asyncio.gather(*(_generate(requests[i]) for i in missing))
+            for i, lesson in zip(missing, results):
+                lessons[i] = lesson
+
+        return lessons
+
+    async def _generate_lesson_batch(
+        self,
+        skill_level: str,
+        requests: List[LessonRequest]
+    ) -> List[Optional[GeneratedLesson]]:
+        """
+        Generate one batch of lessons with a single Claude call.
+
+        Returns:
+            One lesson per request, or None where the batch response has no
+            usable lesson for it (a single request is left to generate_lesson)
+        """
+        lessons: List[Optional[GeneratedLesson]] = [None] * len(requests)
+        if len(requests) <= 1:
+            return lessons
+
+        max_tokens = 1024 * len(requests)
+        try:
+            prompt = self._build_batch_prompt(skill_level, requests)
+            async with self._llm_semaphore:
+                response = await self._call_llm_cached(
+                    "edu:lesson_batch", prompt, "lessons",
+                    max_tokens=max_tokens, timeout=llm_timeout(max_tokens)
+                )
+            items = extract_json(response).get("lessons", [])
+            for i, item in enumerate(items[:len(requests)]):
+                if isinstance(item, dict):
+                    lessons[i] = self._lesson_from_data(item, skill_level)
+        except Exception as e:
+            logger.error(f"Error generating lesson batch: {e}")
+        return lessons
+
+    def _request_kwargs(self, request: LessonRequest) -> dict:
+        """generate_lesson keyword arguments for a LessonRequest."""
+        return {
+            "topic": request.topic,
+            "instruments": request.instruments,
+            "weakness": request.weakness,
+            "performance_summary": request.performance_summary,
+            "length": request.length,
+            "include_examples": request.include_examples
+        }
+
+    def _build_batch_prompt(self, skill_level: str, requests: List[LessonRequest]) -> str:
+        """Render the batch lesson prompt, one numbered entry per request."""
+        lesson_requests = "\n".join(
+            _LESSON_BATCH_ITEM_PROMPT.render(
+                index=i,
+                topic=r.topic,
+                instruments=", ".join(r.instruments or ["general"]),
+                weakness=r.weakness or "general improvement",
+                performance_summary=r.performance_summary or "No recent data available",
+                length=r.length,
+                include_examples=str(r.include_examples).lower()
+            )
+            for i, r in enumerate(requests, start=1)
+        )
+        return _LESSON_BATCH_PROMPT.render(
+            count=len(requests),
+            skill_level=skill_level,
+            lesson_requests=lesson_requests
+        )
+
+    async def generate_lesson_stream(
+        self,
+        user_id: int,
+        topic: str,
+        instruments: Optional[List[str]] = None,
+        weakness: Optional[str] = None,
+        performance_summary: Optional[str] = None,
+        length: str = "medium",
+        include_examples: bool = True
+    ) -> AsyncIterator[LessonSection]:
+        """
+        Generate a personalized lesson, yielding each section as soon as it is complete.
+
+        Takes the same arguments as generate_lesson, but streams the Claude
+        response and parses the "sections" array incrementally so callers
+        can render the first section before the full lesson has arrived.
+        The response is cached only once it has produced a section and
+        parses as a complete lesson.
+
+        Yields:
+            LessonSection objects in lesson order
+
+        Raises:
+            Exception: Errors from the Claude stream propagate to the caller
+        """
+        skill_level = self._get_skill_level(user_id)
+        cache_ttl = self._lesson_cache_ttl(performance_summary)
+        prompt = self._build_lesson_prompt(
+            topic, skill_level, instruments or ["general"],
+            weakness or "general improvement",
+            performance_summary or "No recent data available",
+            length, include_examples
+        )
+        key = self._cache_key("edu:lesson", prompt)
+        parser = JsonArrayStreamParser("sections")
+
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            for s in parser.feed(cached):
+                yield self._to_section(s)
+            return
+
+        if not self._get_client():
+            yield LessonSection(
+                heading="Error",
+                content="AI service is currently unavailable. Please check configuration.",
+                type="warning"
+            )
+            return
+
+        chunks = []
+        section_count = 0
+        async for text in self._stream_llm(
+            system_prompt=EDUCATION_SYSTEM_PROMPT,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1024
+        ):
+            chunks.append(text)
+            for s in parser.feed(text):
+                section_count += 1
+                yield self._to_section(s)
+
+        response = "".join(chunks)
+        if section_count and self._has_content(response, "sections"):
+            self._response_cache.set(key, response, ttl=cache_ttl)
+        else:
+            logger.warning(f"Lesson stream for '{topic}' ended without a complete lesson; not cached")
+
     async def suggest_topics(
         self,
         user_id: int,
@@ -120,12 +389,7 @@ class EducationGenerator(LLMConnector):
         Returns:
             List of suggested topics ranked by relevance
         """
-        try:
-            user = self._db.query(UserModels.User).filter(UserModels.User.id == user_id).first()
-            if user:
-                skill_level = user.experience_level or "beginner"
-        except Exception as e:
-                logger.error(f"Error fetching user profile: {e}")
+        skill_level = self._get_skill_level(user_id)
         completed_lessons = completed_lessons or []
 
         client = self._get_client()
@@ -149,25 +413,30 @@ class EducationGenerator(LLMConnector):
         weakness: str,
         performance_summary: str,
         length: str,
-        include_examples: bool
+        include_examples: bool,
+        cache_ttl: Optional[float] = None
     ) -> str:
         """Make API call to LLM for lesson generation."""
-        prompt = LESSON_GENERATION_TEMPLATE.format(
-            skill_level=skill_level,
-            instruments=", ".join(instruments),
-            weakness=weakness,
-            performance_summary=performance_summary,
-            topic=topic,
-            length=length,
-            include_examples=str(include_examples).lower()
+        prompt = self._build_lesson_prompt(
+            topic, skill_level, instruments, weakness,
+            performance_summary, length, include_examples
         )
+        return await self._call_llm_cached("edu:lesson", prompt, "sections", max_tokens=1024, ttl=cache_ttl)
 
-        return await self._call_llm(
-            system_prompt=EDUCATION_SYSTEM_PROMPT,
-            messages=[
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=1024
+    def _build_lesson_prompt(
+        self,
+        topic: str,
+        skill_level: str,
+        instruments: List[str],
+        weakness: str,
+        performance_summary: str,
+        length: str,
+        include_examples: bool
+    ) -> str:
+        """Render the lesson generation prompt."""
+        return _render_lesson_prompt(
+            topic, skill_level, tuple(instruments), weakness,
+            performance_summary, length, include_examples
         )
 
     async def _get_topics(
@@ -179,76 +448,138 @@ class EducationGenerator(LLMConnector):
         completed_lessons: List[str]
     ) -> str:
         """Make API call to LLM for topic suggestions."""
-        prompt = TOPIC_SUGGESTION_TEMPLATE.format(
-            skill_level=skill_level,
-            instruments=", ".join(instruments) if instruments else "various",
-            win_rate=win_rate,
-            patterns=", ".join(patterns) if patterns else "none detected",
-            completed_lessons=", ".join(completed_lessons) if completed_lessons else "none"
+        prompt = _render_topics_prompt(
+            skill_level,
+            tuple(instruments or ()),
+            win_rate,
+            tuple(patterns or ()),
+            tuple(completed_lessons or ())
         )
 
-        return await self._call_llm(
+        return await self._call_llm_cached("edu:topics", prompt, "suggested_topics", max_tokens=1024)
+
+    async def _call_llm_cached(
+        self,
+        namespace: str,
+        prompt: str,
+        content_key: str,
+        max_tokens: int,
+        ttl: Optional[float] = None,
+        timeout: Optional[httpx.Timeout] = None
+    ) -> str:
+        """
+        Make API call to LLM, reusing a cached response for an identical prompt.
+
+        A response is only cached if it parses and its `content_key` field
+        is non-empty, so a truncated or malformed reply is retried next time.
+
+        Args:
+            namespace: Cache key prefix (e.g. "edu:lesson")
+            prompt: The fully rendered user prompt
+            content_key: JSON field the response must fill to be cached
+            max_tokens: Maximum tokens for the response
+            ttl: Optional cache TTL in seconds (defaults to LLM_CACHE_TTL)
+            timeout: Optional request timeout for long completions
+
+        Returns:
+            Raw LLM response text
+        """
+        key = self._cache_key(namespace, prompt)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = await self._call_llm(
             system_prompt=EDUCATION_SYSTEM_PROMPT,
             messages=[
                 {"role": "user", "content": prompt}
             ],
-            max_tokens=1024
+            max_tokens=max_tokens,
+            timeout=timeout
         )
+        if self._has_content(response, content_key):
+            self._response_cache.set(key, response, ttl=ttl)
+        return response
 
-    def _parse_lesson_response(self, response: str, skill_level: str) -> GeneratedLesson:
-        """Parse the JSON lesson response from LLM."""
+    def _has_content(self, response: str, content_key: str) -> bool:
+        """Whether `response` parses as JSON with a non-empty `content_key` field."""
         try:
-            # Extract JSON from response (LLM might include markdown)
-            json_start = response.find("{")
-            json_end = response.rfind("}") + 1
-            if json_start == -1 or json_end == 0:
-                raise ValueError("No JSON found in response")
+            return bool(extract_json(response).get(content_key))
+        except ValueError:
+            return False
 
-            json_str = response[json_start:json_end]
-            data = json.loads(json_str)
+    def _cache_key(self, namespace: str, prompt: str) -> str:
+        """Build the response cache key for a rendered prompt."""
+        return f"{namespace}:{hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()}"
 
-            sections = [
-                LessonSection(
-                    heading=s.get("heading", ""),
-                    content=s.get("content", ""),
-                    type=s.get("type", "text")
-                )
-                for s in data.get("sections", [])
-            ]
+    def _lesson_cache_ttl(self, performance_summary: Optional[str]) -> int:
+        """
+        Cache TTL for a lesson.
 
-            quiz = [
-                QuizQuestion(
-                    question=q.get("question", ""),
-                    options=q.get("options", []),
-                    correct=q.get("correct", ""),
-                    explanation=q.get("explanation", "")
-                )
-                for q in data.get("quiz", [])
-            ]
+        Generic lessons (no performance summary) only depend on topic, skill
+        level and instruments, so they are kept for GENERIC_LESSON_CACHE_TTL;
+        lessons built around recent performance expire after LLM_CACHE_TTL.
+        """
+        if performance_summary and performance_summary.strip():
+            return self._settings.llm_cache_ttl
+        return self._settings.generic_lesson_cache_ttl
 
-            return GeneratedLesson(
-                title=data.get("title", "Trading Lesson"),
-                skill_level=data.get("skill_level", skill_level),
-                estimated_time_minutes=data.get("estimated_time_minutes", 15),
-                sections=sections,
-                quiz=quiz,
-                key_takeaways=data.get("key_takeaways", []),
-                next_topics=data.get("next_topics", [])
-            )
+    def _get_skill_level(self, user_id: int) -> str:
+        """Look up the user's experience level, defaulting to beginner."""
+        try:
+            user = self._db.query(UserModels.User).filter(UserModels.User.id == user_id).first()
+            if user:
+                return user.experience_level or "beginner"
+        except Exception as e:
+            logger.error(f"Error fetching user profile: {e}")
+        return "beginner"
+
+    def _to_section(self, s: dict) -> LessonSection:
+        """Build a LessonSection from a parsed JSON section."""
+        return LessonSection(
+            heading=s.get("heading", ""),
+            content=s.get("content", ""),
+            type=s.get("type", "text")
+        )
+
+    def _parse_lesson_response(self, response: str, skill_level: str) -> GeneratedLesson:
+        """Parse the JSON lesson response from LLM."""
+        try:
+            # Extract JSON from response (LLM might include markdown)
+            data = extract_json(response)
+            return self._lesson_from_data(data, skill_level)
         except (json.JSONDecodeError, KeyError, ValueError) as e:
             logger.error(f"Failed to parse lesson response: {e}")
             raise
 
+    def _lesson_from_data(self, data: dict, skill_level: str) -> GeneratedLesson:
+        """Build a GeneratedLesson from a parsed JSON lesson object."""
+        sections = [self._to_section(s) for s in data.get("sections", [])]
+
+        quiz = [
+            QuizQuestion(
+                question=q.get("question", ""),
+                options=q.get("options", []),
+                correct=q.get("correct", ""),
+                explanation=q.get("explanation", "")
+            )
+            for q in data.get("quiz", [])
+        ]
+
+        return GeneratedLesson(
+            title=data.get("title", "Trading Lesson"),
+            skill_level=data.get("skill_level", skill_level),
+            estimated_time_minutes=data.get("estimated_time_minutes", 15),
+            sections=sections,
+            quiz=quiz,
+            key_takeaways=data.get("key_takeaways", []),
+            next_topics=data.get("next_topics", [])
+        )
+
     def _parse_topics_response(self, response: str) -> List[TopicSuggestion]:
         """Parse the JSON topics response from Claude."""
         try:
-            json_start = response.find("{")
-            json_end = response.rfind("}") + 1
-            if json_start == -1 or json_end == 0:
-                raise ValueError("No JSON found in response")
-
-            json_str = response[json_start:json_end]
-            data = json.loads(json_str)
+            data = extract_json(response)
 
             return [
                 TopicSuggestion(
@@ -267,11 +598,14 @@ class EducationGenerator(LLMConnector):
 
 # Factory function for dependency injection
 _education_generator: Optional[EducationGenerator] = None
+_education_generator_lock = threading.Lock()
 def get_education_generator() -> EducationGenerator:
     """Get the singleton EducationGenerator instance."""
     global _education_generator
     if _education_generator is None:
-        _education_generator = EducationGenerator()
+        with _education_generator_lock:
+            if _education_generator is None:
+                _education_generator = EducationGenerator()
     return _education_generator
 
 # Example usage
@@ -3,6 +3,7 @@ Educational Analysis Prompt Templates (Unified Compact)
 Used when user clicks "AI Analysis" on Buy or "AI" on Close/Sell buttons.
 Single prompt combining education + analysis, max 200 words.
 """
+from itertools import islice
 
 UNIFIED_ANALYSIS_SYSTEM_PROMPT = """You are TradePT AI, a trading educator. Teach from the trader's current situation.
 
@@ -36,7 +37,7 @@ def build_buy_analysis_prompt(
     trade_type = trade_setup.get('trade_type', 'General')
     trend_type = trade_setup.get('trend_type', 'unknown')
     params = trade_setup.get('parameters') or {}
-    params_str = ", ".join(f"{k}: {v}" for k, v in list(params.items())[:3]) if params else "None"
+    params_str = ", ".join(f"{k}: {v}" for k, v in islice(params.items(), 3)) if params else "None"
 
     return f"""## TRADER
 Level: {user_profile.get('experience_level', 'unknown')} | Style: {user_profile.get('trading_style', 'unknown')} | Risk: {user_profile.get('risk_tolerance', 'unknown')}
@@ -109,6 +110,14 @@ def _format_recent_trades(trades: list, max_trades: int = 3) -> str:
     return "\n".join(lines)
 
 
+# Short labels for patterns named in the compact summary; others use their value
+_PATTERN_LABELS = {
+    "revenge_trading": "Revenge trading",
+    "overtrading": "Overtrading",
+    "risk_issues": "Risk/reward imbalance"
+}
+
+
 def _format_patterns_compact(patterns: list) -> str:
     """Format patterns in one line."""
     if not patterns or not any(getattr(p, 'detected', False) for p in patterns):
@@ -117,14 +126,8 @@ def _format_patterns_compact(patterns: list) -> str:
     for p in patterns:
         if getattr(p, 'detected', False) and hasattr(p, 'pattern'):
             pt = p.pattern.value if hasattr(p.pattern, 'value') else str(p.pattern)
-            if pt == "revenge_trading":
-                desc.append("Revenge trading")
-            elif pt == "overtrading":
-                desc.append("Overtrading")
-            elif pt == "risk_issues":
-                desc.append("Risk/reward imbalance")
-            else:
-                desc.append(pt.replace("_", " "))
+            label = _PATTERN_LABELS.get(pt)
+            desc.append(label if label is not None else pt.replace("_", " "))
     return "; ".join(desc[:2]) if desc else "None detected"
 
 """
@@ -225,6 +228,82 @@ Generate a comprehensive lesson in the following JSON format:
 Create engaging, educational content that directly addresses their weakness and uses examples from their trading instruments.
 """
 
+# Template for generating several lessons in one request
+LESSON_BATCH_TEMPLATE = """Generate {count} personalized trading lessons for the same student.
+
+## Student Profile
+- Skill Level: {skill_level}
+
+## Lessons Requested
+{lesson_requests}
+
+Each request lists its topic, primary trading instruments, identified weakness,
+recent performance, desired length (short: ~500 words, medium: ~1000 words,
+long: ~2000 words) and whether to include practical examples.
+
+Respond in JSON format, where element i of "lessons" is the lesson for request i:
+{{
+    "lessons": [
+        {{
+            "title": "Lesson title",
+            "skill_level": "{skill_level}",
+            "estimated_time_minutes": 15,
+            "sections": [
+                {{
+                    "heading": "Introduction",
+                    "content": "Hook and overview of what will be learned...",
+                    "type": "text"
+                }},
+                {{
+                    "heading": "Core Concept",
+                    "content": "Main educational content...",
+                    "type": "text"
+                }},
+                {{
+                    "heading": "Example",
+                    "content": "Practical example using their instruments...",
+                    "type": "example"
+                }},
+                {{
+                    "heading": "Common Mistake",
+                    "content": "What to avoid...",
+                    "type": "warning"
+                }},
+                {{
+                    "heading": "Pro Tip",
+                    "content": "Advanced insight...",
+                    "type": "tip"
+                }}
+            ],
+            "quiz": [
+                {{
+                    "question": "Question text?",
+                    "options": ["A) First option", "B) Second option", "C) Third option", "D) Fourth option"],
+                    "correct": "A",
+                    "explanation": "Why A is correct..."
+                }}
+            ],
+            "key_takeaways": [
+                "First key learning point",
+                "Second key learning point",
+                "Third key learning point"
+            ],
+            "next_topics": ["Suggested follow-up topic 1", "Suggested follow-up topic 2"]
+        }}
+    ]
+}}
+
+Return exactly {count} lessons, in request order. Each lesson should directly address its weakness and use examples from its trading instruments.
+"""
+
+# Template for one entry in the LESSON_BATCH_TEMPLATE request list
+LESSON_BATCH_ITEM_TEMPLATE = """{index}. Topic: {topic}
+   - Instruments: {instruments}
+   - Weakness: {weakness}
+   - Recent Performance: {performance_summary}
+   - Length: {length}
+   - Include Practical Examples: {include_examples}"""
+
 # Template for suggesting next lesson topics
 TOPIC_SUGGESTION_TEMPLATE = """Based on the trader's profile, suggest the most relevant educational topics:
 
@@ -4,10 +4,10 @@ Uses AI to create educational modules personalized by trader type (momentum/prec
 """
 
 import json
-import asyncio
+import threading
 from typing import Dict, List, Optional
-from anthropic import Anthropic
 from app.config.ai import get_ai_settings
+from app.services.ai.llm.client import get_anthropic_client, llm_timeout
 import logging
 logger = logging.getLogger(__name__)
 
@@ -497,7 +497,7 @@ class ModuleContentGenerator:
 
     def __init__(self):
         self.settings = get_ai_settings()
-        self.anthropic_client = Anthropic(api_key=self.settings.anthropic_api_key)
+        self.anthropic_client = get_anthropic_client()
 
     def get_all_modules(self, trader_type: str = "momentum") -> List[Dict]:
         """Return all module metadata ordered by trader type preference."""
@@ -557,12 +557,12 @@ class ModuleContentGenerator:
         user_prompt = self._build_module_user_prompt(title, category, difficulty, target_concepts)
 
         try:
-            response = await asyncio.to_thread(
-                self.anthropic_client.messages.create,
+            response = await self.anthropic_client.messages.create(
                 model=self.settings.anthropic_model_name,
                 max_tokens=4000,
                 system=system_prompt,
                 messages=[{"role": "user", "content": user_prompt}],
+                timeout=llm_timeout(4000),
             )
 
             content_text = response.content[0].text
@@ -688,11 +688,14 @@ Generate 4 sections (Introduction, Core Concept, Practical Application, Common M
 
 # Singleton instance
 _generator: Optional[ModuleContentGenerator] = None
+_generator_lock = threading.Lock()
 
 
 def get_module_generator() -> ModuleContentGenerator:
     """Get singleton instance."""
     global _generator
     if _generator is None:
-        _generator = ModuleContentGenerator()
+        with _generator_lock:
+            if _generator is None:
+                _generator = ModuleContentGenerator()
     return _generator
\ No newline at end of file
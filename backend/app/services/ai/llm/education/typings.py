@@ -1,8 +1,8 @@
 
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class LessonSection:
     """A section within a lesson."""
     heading: str
@@ -10,7 +10,7 @@ class LessonSection:
     type: str  # "text", "example", "warning", "tip"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class QuizQuestion:
     """A quiz question."""
     question: str
@@ -19,7 +19,7 @@ class QuizQuestion:
     explanation: str
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class GeneratedLesson:
     """A complete generated lesson."""
     title: str
@@ -31,11 +31,22 @@ class GeneratedLesson:
     next_topics: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TopicSuggestion:
     """A suggested lesson topic."""
     topic: str
     relevance_score: float
     reason: str
     difficulty: str = "beginner"
-    estimated_duration_minutes: int = 15
\ No newline at end of file
+    estimated_duration_minutes: int = 15
+
+
+@dataclass(slots=True, frozen=True)
+class LessonRequest:
+    """Parameters for one lesson in a batch generation request."""
+    topic: str
+    instruments: Optional[List[str]] = None
+    weakness: Optional[str] = None
+    performance_summary: Optional[str] = None
+    length: str = "medium"
+    include_examples: bool = True
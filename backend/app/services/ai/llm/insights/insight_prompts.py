@@ -26,10 +26,8 @@ Important guidelines:
 You must respond with valid JSON only. No additional text outside the JSON structure.
 """
 
-# User prompt template with placeholders for statistics
-INSIGHT_USER_TEMPLATE = """Analyze the following trading statistics and provide personalized insights:
-
-## User Profile (from Questionnaire)
+# Trader data section shared by the single and batch insight prompts
+INSIGHT_PROFILE_TEMPLATE = """## User Profile (from Questionnaire)
 - Experience Level: {experience_level}
 - Capital Allocation: {capital_allocation}
 - Trading Style: {trading_style}
@@ -56,15 +54,22 @@ INSIGHT_USER_TEMPLATE = """Analyze the following trading statistics and provide
 {detected_patterns}
 
 ## User Level
-{user_level}
+{user_level}"""
 
-IMPORTANT PERSONALIZATION GUIDELINES:
+INSIGHT_GUIDELINES = """IMPORTANT PERSONALIZATION GUIDELINES:
 - Match the complexity of insights to the user's experience level
 - For beginners: Explain concepts simply, suggest basic improvements
 - For advanced traders: Use technical language, focus on optimization
 - Compare their actual behavior to their stated risk tolerance
 - If they say "conservative" but trade aggressively, flag this mismatch
-- Tailor recommendations to their trading style (scalper vs swing trader)
+- Tailor recommendations to their trading style (scalper vs swing trader)"""
+
+# User prompt template with placeholders for statistics
+INSIGHT_USER_TEMPLATE = """Analyze the following trading statistics and provide personalized insights:
+
+""" + INSIGHT_PROFILE_TEMPLATE + """
+
+""" + INSIGHT_GUIDELINES + """
 
 Based on this data, provide insights in the following JSON format:
 {{
@@ -85,6 +90,36 @@ Based on this data, provide insights in the following JSON format:
 Provide 2-4 insights and 2-3 recommendations based on the data. Be specific and actionable.
 """
 
+# Template for analyzing several traders in one request; {traders} holds one
+# rendered INSIGHT_PROFILE_TEMPLATE per trader, each under a "# Trader i" heading
+INSIGHT_BATCH_TEMPLATE = """Analyze the trading statistics of the following {count} traders and provide personalized insights for each of them separately:
+
+{traders}
+
+""" + INSIGHT_GUIDELINES + """
+
+Respond in JSON format, where element i of "results" is the analysis for Trader i:
+{{
+    "results": [
+        {{
+            "summary": "One sentence overall assessment of their trading",
+            "insights": [
+                {{"type": "strength", "message": "What they're doing well", "priority": "high"}},
+                {{"type": "weakness", "message": "Area for improvement", "priority": "medium"}},
+                {{"type": "observation", "message": "Notable pattern or trend", "priority": "low"}}
+            ],
+            "recommendations": [
+                "Specific actionable recommendation 1",
+                "Specific actionable recommendation 2"
+            ],
+            "suggested_lesson": "Topic name for next educational content"
+        }}
+    ]
+}}
+
+Provide 2-4 insights and 2-3 recommendations per trader based on their own data. Be specific and actionable.
+"""
+
 # Descriptions for detected trading patterns
 PATTERN_DESCRIPTIONS = {
     "revenge_trading": "Revenge trading detected: You tend to make rapid trades after losses, often with increased risk. This emotional response can lead to larger losses.",
@@ -4,21 +4,64 @@ Trading Insight Generator Service
 Uses Claude API to generate personalized trading insights
 based on statistical analysis of user trade data.
 """
-from typing import Dict, Any, Optional, List
+from typing import AsyncIterator, Dict, Any, Optional, List, Tuple
+from dataclasses import replace
+import asyncio
 from datetime import datetime
-import json
+import hashlib
+import math
+import threading
+
+import orjson
 
 from app.services.ai.llm.insights.typings import InsightResponse, TradingInsight
 from app.services.ai.llm.insights.insight_prompts import (
     INSIGHT_SYSTEM_PROMPT,
     INSIGHT_USER_TEMPLATE,
+    INSIGHT_PROFILE_TEMPLATE,
+    INSIGHT_BATCH_TEMPLATE,
     PATTERN_DESCRIPTIONS
 )
 from app.services.logger.logger import logger
+from app.services.cache.cache import SemanticCache, SingleFlight, TTLCache
+from app.services.ai.embeddings.embeddings import get_embedding_service
+from app.services.ai.llm.client import llm_timeout
 from app.services.ai.llm.connector import LLMConnector
-from app.services.analysis.typings import PatternDetectionResult
+from app.services.ai.llm.parsing import JsonArrayStreamParser, extract_json
+from app.services.ai.llm.prompt import PreparedPrompt
+from app.services.analysis.typings import PatternDetectionResult, TradingPattern
 from app.database.model import users as UserModels
 
+# Template is parsed once here rather than on every `.format()` call. The JSON
+# instruction is appended here too, since Claude doesn't have response_format
+_INSIGHT_PROMPT = PreparedPrompt(
+    INSIGHT_USER_TEMPLATE + "\n\nIMPORTANT: Respond with valid JSON only. No other text."
+)
+_INSIGHT_PROFILE_PROMPT = PreparedPrompt(INSIGHT_PROFILE_TEMPLATE)
+_INSIGHT_BATCH_PROMPT = PreparedPrompt(
+    INSIGHT_BATCH_TEMPLATE + "\n\nIMPORTANT: Respond with valid JSON only. No other text."
+)
+
+# Prompt description of each pattern, keyed by enum member; patterns without
+# one fall back to their detection details
+_PATTERN_TEXT = {
+    pattern: PATTERN_DESCRIPTIONS[pattern.value]
+    for pattern in TradingPattern
+    if pattern.value in PATTERN_DESCRIPTIONS
+}
+
+# Max users analyzed per batched Claude call
+INSIGHT_BATCH_SIZE = 8
+
+
+def _money_bucket(value: float) -> float:
+    """Log-scale bucket of an amount; amounts within ~20% of each other share one."""
+    value = float(value)
+    if not value:
+        return 0.0
+    return math.copysign(round(4 * math.log2(abs(value) + 1)), value)
+
+
 class InsightGenerator(LLMConnector):
     """
     Generates personalized trading insights using Claude AI.
@@ -30,6 +73,17 @@ class InsightGenerator(LLMConnector):
     def __init__(self):
         """Initialize the insight generator with Claude client."""
         super().__init__()
+        self._embedding_service = get_embedding_service()
+        # Repeated polls with unchanged inputs reuse the last response...
+        self._response_cache = TTLCache(ttl=self._settings.insight_cache_ttl, maxsize=2048)
+        # ...as do polls with near-identical stats
+        self._insight_cache = SemanticCache(
+            threshold=self._settings.insight_cache_threshold,
+            ttl=self._settings.insight_cache_ttl
+        )
+        self._cache_stats = {"hits": 0, "semantic_hits": 0, "misses": 0}
+        # Concurrent misses for the same inputs share one LLM call
+        self._inflight = SingleFlight()
 
     async def generate_insights(
         self,
@@ -48,35 +102,268 @@ class InsightGenerator(LLMConnector):
         Returns:
             InsightResponse with insights and recommendations
         """
-        # Fetch and analyze trades
-        trades = await self._deriv_service.get_recent_trades(limit)
-
-        if not trades:
+        prepared = await self._prepare_insight_prompt(user_id, limit, user_context)
+        if prepared is None:
             return self._empty_response()
+        statistics, prompt, response_key, semantic_key, stats_bucket = prepared
 
-        statistics = self._analysis_service.calculate_statistics(trades)
-        patterns = self._analysis_service.detect_patterns(trades)
+        cached, cache_vector = await self._get_cached_response(
+            user_id, statistics, response_key, semantic_key, stats_bucket
+        )
+        if cached is not None:
+            return cached
 
-        # Format patterns for the prompt
-        pattern_text = self._format_patterns(patterns)
+        # Try to generate AI insight
+        if self._get_client():
+            try:
+                return await self._inflight.do(
+                    response_key,
+                    lambda: self._generate_and_cache(
+                        user_id, prompt, statistics, response_key, cache_vector, stats_bucket
+                    )
+                )
+            except Exception as e:
+                logger.error("Error generating AI insights: %s", e)
 
-        # Calculate average trade duration
-        avg_duration = self._analysis_service.format_duration(statistics["average_trade_duration_hours"])
+        # Fallback removed - return basic stats response without AI insights
+        return InsightResponse(
+            summary=f"Analyzed {statistics.get('total_trades', 0)} trades.",
+            insights=[],
+            recommendations=["AI insights are currently unavailable. Please check configuration."],
+            statistics=statistics,
+            suggested_lesson=""
+        )
+
+    async def generate_insights_batch(
+        self,
+        user_ids: List[int],
+        limit: int = 5
+    ) -> List[InsightResponse]:
+        """
+        Generate trading insights for several users with batched Claude calls.
+
+        Meant for bulk regeneration: up to INSIGHT_BATCH_SIZE uncached users
+        share one call, saving a round trip and the repeated instructions
+        per user. Any user missing or malformed in a batch response is
+        regenerated individually with generate_insights.
+
+        Args:
+            user_ids: Users to generate insights for
+            limit: Number of trades to analyze per user
+
+        Returns:
+            InsightResponse objects in the same order as user_ids
+        """
+        if len(user_ids) <= 1:
+            return [await self.generate_insights(user_id, limit) for user_id in user_ids]
+
+        prepared = await asyncio.gather(*(
+            self._prepare_insight_prompt(user_id, limit, None, template=_INSIGHT_PROFILE_PROMPT)
+            for user_id in user_ids
+        ))
+
+        results: List[Optional[InsightResponse]] = [None] * len(user_ids)
+        pending = []
+        for i, (user_id, item) in enumerate(zip(user_ids, prepared)):
+            if item is None:
+                results[i] = self._empty_response()
+                continue
+            statistics, profile, response_key, semantic_key, stats_bucket = item
+            cached, cache_vector = await self._get_cached_response(
+                user_id, statistics, response_key, semantic_key, stats_bucket
+            )
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, statistics, profile, response_key, cache_vector, stats_bucket))
+
+        if len(pending) > 1 and self._get_client():
+            batches = [pending[j:j + INSIGHT_BATCH_SIZE] for j in range(0, len(pending), INSIGHT_BATCH_SIZE)]
+            for batch, responses in zip(batches, await asyncio.gather(
+                *(self._generate_batch(batch) for batch in batches)
+            )):
+                for (i, _, _, response_key, cache_vector, stats_bucket), result in zip(batch, responses):
+                    if result is not None:
+                        self._cache_response(user_ids[i], response_key, cache_vector, stats_bucket, result)
+                        results[i] = result
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            if len(pending) > 1:
+                logger.warning("Insight batch incomplete, generating %s user(s) individually", len(missing))
+            for i, result in zip(missing, await asyncio.gather(
+                *(self.generate_insights(user_ids[i], limit) for i in missing)
+            )):
+                results[i] = result
+
+        return results
+
+    async def _generate_batch(self, batch: List[tuple]) -> List[Optional[InsightResponse]]:
+        """
+        Generate insights for one batch of (index, statistics, profile, ...) entries.
+
+        Returns:
+            One parsed response per entry, or None where the batch response
+            has no usable result for it
+        """
+        responses: List[Optional[InsightResponse]] = [None] * len(batch)
+        max_tokens = 1024 * len(batch)
+        try:
+            response = await self._call_llm(
+                system_prompt=INSIGHT_SYSTEM_PROMPT,
+                messages=[
+                    {"role": "user", "content": self._build_batch_prompt([entry[2] for entry in batch])}
+                ],
+                max_tokens=max_tokens,
+                timeout=llm_timeout(max_tokens)
+            )
+            items = extract_json(response).get("results", [])
+            for j, item in enumerate(items[:len(batch)]):
+                if isinstance(item, dict) and item.get("insights"):
+                    responses[j] = self._response_from_data(item, batch[j][1])
+        except Exception as e:
+            logger.error("Error generating insight batch: %s", e)
+        return responses
+
+    def _build_batch_prompt(self, profiles: List[str]) -> str:
+        """Render the batch insight prompt, one numbered section per trader."""
+        traders = "\n\n".join(
+            f"# Trader {i}\n\n{profile}" for i, profile in enumerate(profiles, start=1)
+        )
+        return _INSIGHT_BATCH_PROMPT.render(count=len(profiles), traders=traders)
+
+    async def _get_cached_response(
+        self,
+        user_id: int,
+        statistics: Dict[str, Any],
+        response_key: str,
+        semantic_key: str,
+        stats_bucket: tuple
+    ) -> Tuple[Optional[InsightResponse], Any]:
+        """
+        Look up a cached response, first by exact inputs, then by similarity
+        among responses for the same user and stats bucket.
+
+        Returns:
+            Tuple of (cached response or None, embedding of semantic_key);
+            the embedding is None on an exact hit
+        """
+        cached = self._response_cache.get(response_key)
+        if cached is not None:
+            self._cache_stats["hits"] += 1
+            return replace(cached, generated_at=datetime.now().isoformat()), None
+
+        # Embedding is CPU-bound; keep it off the event loop
+        cache_vector = await asyncio.to_thread(self._embedding_service.get_embedding, semantic_key)
+        cached = self._insight_cache.get((user_id, stats_bucket), cache_vector)
+        if cached is not None:
+            logger.debug("Reusing cached insights for user %s", user_id)
+            self._cache_stats["semantic_hits"] += 1
+            return replace(cached, statistics=statistics, generated_at=datetime.now().isoformat()), cache_vector
+        self._cache_stats["misses"] += 1
+        return None, cache_vector
+
+    async def generate_insights_stream(
+        self,
+        user_id: int,
+        limit: int = 5,
+        user_context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[TradingInsight]:
+        """
+        Generate trading insights, yielding each one as soon as it is complete.
+
+        Takes the same arguments as generate_insights, but streams the Claude
+        response and parses its "insights" array incrementally. Cached
+        responses are replayed immediately, and a completed stream is cached
+        like a generate_insights response. Without a configured client a
+        single "unavailable" insight is yielded instead.
+
+        Yields:
+            TradingInsight objects in response order
+
+        Raises:
+            Exception: Errors from the Claude stream propagate to the caller
+        """
+        prepared = await self._prepare_insight_prompt(user_id, limit, user_context)
+        if prepared is None:
+            for insight in self._empty_response().insights:
+                yield insight
+            return
+        statistics, prompt, response_key, semantic_key, stats_bucket = prepared
+
+        cached, cache_vector = await self._get_cached_response(
+            user_id, statistics, response_key, semantic_key, stats_bucket
+        )
+        if cached is not None:
+            for insight in cached.insights:
+                yield insight
+            return
+
+        if not self._get_client():
+            yield TradingInsight(
+                type="observation",
+                message="AI insights are currently unavailable. Please check configuration.",
+                priority="medium"
+            )
+            return
 
+        parser = JsonArrayStreamParser("insights")
+        chunks = []
+        async for text in self._stream_llm(
+            system_prompt=INSIGHT_SYSTEM_PROMPT,
+            messages=[
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1024
+        ):
+            chunks.append(text)
+            for i in parser.feed(text):
+                yield self._to_insight(i)
+
+        self._cache_response(
+            user_id, response_key, cache_vector, stats_bucket, self._parse_response("".join(chunks), statistics)
+        )
+
+    async def _prepare_insight_prompt(
+        self,
+        user_id: int,
+        limit: int,
+        user_context: Optional[Dict[str, Any]],
+        template: PreparedPrompt = _INSIGHT_PROMPT
+    ) -> Optional[Tuple[Dict[str, Any], str, str, str, tuple]]:
+        """
+        Fetch and analyze trades, then render the insight prompt (or, with
+        `template=_INSIGHT_PROFILE_PROMPT`, just the trader data section).
+
+        Returns:
+            Tuple of (statistics, prompt, response_key, semantic_key,
+            stats_bucket), or None if the user has no trades. The keys leave
+            out fast-moving market data: response_key is a digest of every
+            other prompt input, semantic_key is a short text summary of the
+            stats and patterns for the similarity cache, and stats_bucket
+            holds the bucketed numbers and settings a similar response must
+            share to be reused.
+        """
         # Parse user preferences from context
         if user_context is None:
             user_context = {}
 
+        # Defaults for unknown users or a failed profile lookup
+        db_experience = "beginner"
+        db_trading_style = "day trader"
+        db_risk_behavior = "cut loss"
+        db_capital_allocation = "low risk"
+        db_asset_preference = "commodities"
         try:
             user = self._db.query(UserModels.User).filter(UserModels.User.id == user_id).first()
             if user:
-                db_experience = user.experience_level or "beginner"
-                db_trading_style = user.trading_duration or "day trader"
-                db_risk_behavior = user.risk_tolerance or "cut loss"
-                db_capital_allocation = user.capital_allocation or "low risk"
-                db_asset_preference = user.asset_preference or "commodities"
+                db_experience = user.experience_level or db_experience
+                db_trading_style = user.trading_duration or db_trading_style
+                db_risk_behavior = user.risk_tolerance or db_risk_behavior
+                db_capital_allocation = user.capital_allocation or db_capital_allocation
+                db_asset_preference = user.asset_preference or db_asset_preference
         except Exception as e:
-                logger.error(f"Error fetching user profile: {e}")
+            logger.error("Error fetching user profile: %s", e)
 
         preferences = {
             "experience_level": user_context.get("experience_level", db_experience),
@@ -87,40 +374,64 @@ class InsightGenerator(LLMConnector):
             "preferred_assets": user_context.get("preferred_assets", db_asset_preference)
         }
 
-        # Fetch market context from Deriv API
-        market_context = "Market data not available"
-        try:
-            # market_context = await self._deriv_service.get_market_context_safe(
-            #     [preferences["preferred_assets"]]
-            # )
-            market_context = await self._deriv_service.get_market_context(
-                [preferences["preferred_assets"]]
-            )
-        except Exception as e:
-            logger.warning(f"Could not fetch market context: {e}")
+        # Trades and market context are independent Deriv round trips, so
+        # fetch them concurrently. Only aggregates are needed here, so skip
+        # the per-contract descriptions
+        trades, market_context = await asyncio.gather(
+            self._deriv_service.get_recent_trades(limit, description=False),
+            self._get_market_context(preferences["preferred_assets"])
+        )
 
-        # Try to generate AI insight
-        self._client = self._get_client()
-        if self._client:
-            try:
-                response = await self._get_insight_llm(
-                    statistics, pattern_text, avg_duration, limit, preferences["experience_level"],
-                    preferences, market_context
-                )
-                return self._parse_response(response, statistics)
-            except Exception as e:
-                logger.error(f"Error generating AI insights: {e}")
+        if not trades:
+            return None
 
-        # Fallback removed - return basic stats response without AI insights
-        return InsightResponse(
-            summary=f"Analyzed {statistics.get('total_trades', 0)} trades.",
-            insights=[],
-            recommendations=["AI insights are currently unavailable. Please check configuration."],
-            statistics=statistics,
-            suggested_lesson=""
+        statistics, patterns = self._analysis_service.analyze_trades(trades)
+
+        # Format patterns for the prompt
+        pattern_text = self._format_patterns(patterns)
+
+        # Calculate average trade duration
+        avg_duration = self._analysis_service.format_duration(statistics["average_trade_duration_hours"])
+
+        prompt = self._build_insight_prompt(
+            statistics, pattern_text, avg_duration, limit, preferences["experience_level"],
+            preferences, market_context, template
+        )
+        response_key = hashlib.blake2b(
+            orjson.dumps(
+                [user_id, limit, preferences, statistics, pattern_text],
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+                default=str
+            ),
+            digest_size=16
+        ).hexdigest()
+        semantic_key = (
+            f"{statistics['total_trades']}|{statistics['win_rate']:.1f}|"
+            f"{preferences['experience_level']}|{pattern_text}"
+        )
+        stats_bucket = (
+            statistics["total_trades"],
+            round(float(statistics["win_rate"]) / 5),
+            _money_bucket(statistics["total_profit_loss"]),
+            _money_bucket(statistics["largest_win"]),
+            _money_bucket(statistics["largest_loss"]),
+            str(preferences["trading_style"]),
+            str(preferences["risk_behavior"]),
+            str(preferences["capital_allocation"]),
+            float(preferences["risk_per_trade"])
         )
+        return statistics, prompt, response_key, semantic_key, stats_bucket
 
-    async def _get_insight_llm(
+    async def _get_market_context(self, preferred_assets: Any) -> str:
+        """Fetch market context for the user's preferred assets from Deriv."""
+        try:
+            # return await self._deriv_service.get_market_context_safe([preferred_assets])
+            return await self._deriv_service.get_market_context([preferred_assets])
+        except Exception as e:
+            logger.warning("Could not fetch market context: %s", e)
+            return "Market data not available"
+
+    def _build_insight_prompt(
         self,
         stats: Dict[str, Any],
         pattern_text: str,
@@ -128,13 +439,14 @@ class InsightGenerator(LLMConnector):
         days: int,
         user_level: str,
         preferences: Dict[str, Any] = None,
-        market_context: str = "Market data not available"
+        market_context: str = "Market data not available",
+        template: PreparedPrompt = _INSIGHT_PROMPT
     ) -> str:
-        """Make API call to LLM for insights generation."""
+        """Render `template` (by default the full, JSON-only insight prompt) with the trader data."""
         if preferences is None:
             preferences = {}
 
-        prompt = INSIGHT_USER_TEMPLATE.format(
+        return template.render(
             # User preferences from questionnaire
             experience_level=preferences.get("experience_level", user_level),
             trading_style=preferences.get("trading_style", "day_trader"),
@@ -160,28 +472,59 @@ class InsightGenerator(LLMConnector):
             user_level=user_level
         )
 
-        # Add JSON instruction to prompt since Claude doesn't have response_format
-        json_prompt = prompt + "\n\nIMPORTANT: Respond with valid JSON only. No other text."
-        
+    async def _generate_and_cache(
+        self,
+        user_id: int,
+        prompt: str,
+        statistics: Dict[str, Any],
+        response_key: str,
+        cache_vector: Any,
+        stats_bucket: tuple
+    ) -> InsightResponse:
+        """Call the LLM for insights and cache the parsed response if it has any."""
+        response = await self._get_insight_llm(prompt)
+        result = self._parse_response(response, statistics)
+        self._cache_response(user_id, response_key, cache_vector, stats_bucket, result)
+        return result
+
+    def _cache_response(
+        self,
+        user_id: int,
+        response_key: str,
+        cache_vector: Any,
+        stats_bucket: tuple,
+        result: InsightResponse
+    ) -> None:
+        """Store a generated response in both insight caches, if it has any insights."""
+        if result.insights:
+            self._response_cache.set(response_key, result)
+            self._insight_cache.set((user_id, stats_bucket), cache_vector, result)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Insight cache counters: exact hits, similarity hits, misses and entries."""
+        return {
+            **self._cache_stats,
+            "entries": len(self._response_cache),
+            "semantic_entries": len(self._insight_cache)
+        }
+
+    async def _get_insight_llm(self, prompt: str) -> str:
+        """Make API call to LLM for insights generation."""
         return await self._call_llm(
             system_prompt=INSIGHT_SYSTEM_PROMPT,
             messages=[
-                {"role": "user", "content": json_prompt}
+                {"role": "user", "content": prompt}
             ],
             max_tokens=1024
         )
 
     def _format_patterns(self, patterns: List[PatternDetectionResult]) -> str:
         """Format detected patterns for the prompt."""
-        lines = []
-        for pattern in patterns:
-            if pattern.detected:
-                description = PATTERN_DESCRIPTIONS.get(
-                    pattern.pattern.value,
-                    pattern.details
-                )
-                lines.append(f"- {description} (Confidence: {pattern.confidence:.0%})")
-
+        lines = [
+            f"- {_PATTERN_TEXT.get(pattern.pattern, pattern.details)} (Confidence: {pattern.confidence:.0%})"
+            for pattern in patterns
+            if pattern.detected
+        ]
         return "\n".join(lines) if lines else "No significant patterns detected."
 
     def _parse_response(
@@ -191,27 +534,9 @@ class InsightGenerator(LLMConnector):
     ) -> InsightResponse:
         """Parse the JSON response from Claude."""
         try:
-            data = json.loads(response)
-
-            insights = [
-                TradingInsight(
-                    type=i.get("type", "observation"),
-                    message=i.get("message", ""),
-                    priority=i.get("priority", "medium")
-                )
-                for i in data.get("insights", [])
-            ]
-
-            return InsightResponse(
-                summary=data.get("summary", "Analysis complete."),
-                insights=insights,
-                recommendations=data.get("recommendations", []),
-                statistics=statistics,
-                suggested_lesson=data.get("suggested_lesson", ""),
-                generated_at=datetime.now().isoformat()
-            )
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse Claude response: {e}")
+            return self._response_from_data(extract_json(response), statistics)
+        except ValueError as e:
+            logger.error("Failed to parse Claude response: %s", e)
             return InsightResponse(
                 summary="Error parsing AI response.",
                 insights=[],
@@ -220,6 +545,25 @@ class InsightGenerator(LLMConnector):
                 suggested_lesson=""
             )
 
+    def _response_from_data(self, data: dict, statistics: Dict[str, Any]) -> InsightResponse:
+        """Build an InsightResponse from a parsed JSON analysis."""
+        return InsightResponse(
+            summary=data.get("summary", "Analysis complete."),
+            insights=[self._to_insight(i) for i in data.get("insights", [])],
+            recommendations=data.get("recommendations", []),
+            statistics=statistics,
+            suggested_lesson=data.get("suggested_lesson", ""),
+            generated_at=datetime.now().isoformat()
+        )
+
+    def _to_insight(self, i: dict) -> TradingInsight:
+        """Build a TradingInsight from a parsed JSON insight."""
+        return TradingInsight(
+            type=i.get("type", "observation"),
+            message=i.get("message", ""),
+            priority=i.get("priority", "medium")
+        )
+
     def _empty_response(self) -> InsightResponse:
         """Return response when no trades exist."""
         return InsightResponse(
@@ -239,11 +583,14 @@ class InsightGenerator(LLMConnector):
 
 # Factory function for dependency injection
 _insight_generator: Optional[InsightGenerator] = None
+_insight_generator_lock = threading.Lock()
 def get_insight_generator() -> InsightGenerator:
     """Get the singleton InsightGenerator instance."""
     global _insight_generator
     if _insight_generator is None:
-        _insight_generator = InsightGenerator()
+        with _insight_generator_lock:
+            if _insight_generator is None:
+                _insight_generator = InsightGenerator()
     return _insight_generator
 
 # Example usage:
@@ -4,7 +4,7 @@ from typing import Dict, Any, List
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TradingInsight:
     """A single trading insight."""
     type: str  # "strength", "weakness", "observation"
@@ -12,7 +12,7 @@ class TradingInsight:
     priority: str  # "high", "medium", "low"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class InsightResponse:
     """Complete insight response for a user."""
     summary: str
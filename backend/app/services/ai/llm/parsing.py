@@ -0,0 +1,165 @@
+"""
+LLM Response Parsing
+
+Helpers for pulling structured data out of model completions, which are
+asked for bare JSON but sometimes wrap it in prose or markdown fences.
+"""
+import json
+import re
+from typing import List, Optional
+import orjson
+from app.services.logger.logger import logger
+
+# Shared decoder; JSONDecoder holds no per-call state, so one instance is reused
+JSON_DECODER = json.JSONDecoder()
+
+# Characters that matter when tracking brace depth in streamed JSON
+_STRUCTURE_CHARS = re.compile(r'[{}"]')
+_STRING_CHARS = re.compile(r'["\\]')
+
+
+def extract_json(response: str) -> dict:
+    """
+    Parse the JSON object contained in an LLM response.
+
+    Tries orjson on the whole response first (the prompts ask for bare JSON),
+    then decodes from each opening brace in turn, returning the first one
+    that starts a complete JSON object.
+
+    Raises:
+        ValueError: If the response contains no JSON object
+    """
+    try:
+        data = orjson.loads(response)
+        if isinstance(data, dict):
+            return data
+    except orjson.JSONDecodeError:
+        pass
+
+    # raw_decode stops at the matching close brace in a single pass, so
+    # trailing prose or fences after the object are never scanned
+    json_start = response.find("{")
+    while json_start != -1:
+        try:
+            data, _ = JSON_DECODER.raw_decode(response, json_start)
+            if isinstance(data, dict):
+                return data
+        except json.JSONDecodeError:
+            pass
+        json_start = response.find("{", json_start + 1)
+
+    raise ValueError("No JSON found in response")
+
+
+class JsonArrayStreamParser:
+    """
+    Incrementally extracts the objects of one array from a streamed JSON response.
+
+    Text is fed in as it arrives; each call returns the array's objects that
+    became complete since the previous call. Partial objects stay buffered
+    until the rest of their JSON has been received.
+
+    Brace depth is tracked as text arrives (ignoring braces inside strings),
+    so each object is decoded exactly once, when its closing brace lands,
+    instead of re-parsing the partial object on every chunk.
+    """
+
+    def __init__(self, key: str):
+        """
+        Args:
+            key: Name of the array to extract (e.g. "sections")
+        """
+        self._key = f'"{key}"'
+        self._buffer = ""
+        self._pos: Optional[int] = None
+        self._scan = 0
+        self._depth = 0
+        self._in_string = False
+        self._done = False
+
+    def feed(self, text: str) -> List[dict]:
+        """Add streamed text and return any newly completed objects."""
+        self._buffer += text
+        if self._done:
+            return []
+
+        if self._pos is None:
+            key = self._buffer.find(self._key)
+            start = self._buffer.find("[", key) if key != -1 else -1
+            if start == -1:
+                return []
+            self._pos = start + 1
+
+        objects = []
+        while True:
+            if self._depth == 0:
+                while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n,":
+                    self._pos += 1
+                if self._pos >= len(self._buffer):
+                    break
+                if self._buffer[self._pos] == "]":
+                    self._done = True
+                    break
+                if self._buffer[self._pos] != "{":
+                    # Not an object; let the decoder find where it ends
+                    try:
+                        _, self._pos = JSON_DECODER.raw_decode(self._buffer, self._pos)
+                    except json.JSONDecodeError:
+                        break
+                    continue
+                self._scan = self._pos
+
+            if not self._scan_object():
+                # Object not fully received yet
+                break
+            try:
+                obj, self._pos = JSON_DECODER.raw_decode(self._buffer, self._pos)
+                objects.append(obj)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping malformed streamed object: {e}")
+                self._pos = self._scan
+
+        # Drop text that has been fully consumed
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._scan -= self._pos
+            self._pos = 0
+        return objects
+
+    def _scan_object(self) -> bool:
+        """Advance over the current object; True once its closing brace has arrived."""
+        buffer = self._buffer
+        i = self._scan
+        while True:
+            if self._in_string:
+                m = _STRING_CHARS.search(buffer, i)
+                if m is None:
+                    self._scan = len(buffer)
+                    return False
+                i = m.start()
+                if buffer[i] == "\\":
+                    if i + 1 >= len(buffer):
+                        # Wait for the escaped character
+                        self._scan = i
+                        return False
+                    i += 2
+                    continue
+                self._in_string = False
+                i += 1
+                continue
+
+            m = _STRUCTURE_CHARS.search(buffer, i)
+            if m is None:
+                self._scan = len(buffer)
+                return False
+            i = m.end()
+            c = m.group()
+            if c == '"':
+                self._in_string = True
+            elif c == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._scan = i
+                    return True
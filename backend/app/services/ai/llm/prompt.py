@@ -0,0 +1,57 @@
+"""
+Prepared Prompt Templates
+
+Prompt templates are plain `str.format` strings. `PreparedPrompt` parses
+such a template once, at import time, into literal chunks and field
+slots so that rendering a prompt is just a join instead of re-tokenizing
+the format string on every request.
+"""
+from string import Formatter
+from typing import Any, List, Optional, Tuple
+
+
+class PreparedPrompt:
+    """
+    A `str.format` template pre-split into literal text and named fields.
+
+    `render(**kwargs)` produces the same output as `template.format(**kwargs)`
+    for templates that only use plain keyword fields (optionally with a
+    format spec or `!r`/`!s`/`!a` conversion).
+    """
+
+    __slots__ = ("template", "_parts")
+
+    def __init__(self, template: str):
+        """
+        Args:
+            template: A `str.format` style template string
+        """
+        self.template = template
+        self._parts: List[Tuple[str, Optional[str], str, Optional[str]]] = []
+
+        for literal, field, spec, conversion in Formatter().parse(template):
+            if field is not None and not field.isidentifier():
+                raise ValueError(f"Unsupported template field: {{{field}}}")
+            if spec and "{" in spec:
+                raise ValueError(f"Nested format specs are not supported: {{{field}:{spec}}}")
+            self._parts.append((literal, field, spec or "", conversion))
+
+    def render(self, **kwargs: Any) -> str:
+        """Render the template with the given keyword values."""
+        chunks = []
+        for literal, field, spec, conversion in self._parts:
+            if literal:
+                chunks.append(literal)
+            if field is None:
+                continue
+
+            value = kwargs[field]
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "a":
+                value = ascii(value)
+            elif conversion == "s":
+                value = str(value)
+            chunks.append(format(value, spec))
+
+        return "".join(chunks)
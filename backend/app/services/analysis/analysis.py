@@ -10,11 +10,13 @@ NOTE: This service requires a Trade model to exist in the database.
 Until the Trade model is created, this service uses mock data for testing.
 """
 import asyncio
+from collections import Counter
+import math
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from app.services.analysis.typings import PatternDetectionResult, TradingPattern, TradeData, MockTradeData
-import statistics
-import random
+from typing import List, Dict, Any, Optional, Tuple
+from app.services.analysis.typings import PatternDetectionResult, TradingPattern, TradeData, MockTradeData, TradeArrays, PatternStats
+from app.services.analysis.kernels import revenge_stats
+import numpy as np
 from app.services.logger.logger import logger
 from app.services.deriv.deriv import get_deriv_service
 
@@ -56,8 +58,7 @@ class AnalysisService:
         if not trades:
             return 0.0
 
-        winning_trades = sum(1 for t in trades if t.get('sell_price', 0) > t.get('buy_price', 0))
-        return (winning_trades / len(trades)) * 100
+        return float((_to_arrays(trades).pl > 0).mean() * 100)
 
 
     def calculate_statistics(self, trades: List[Any]) -> Dict[str, Any]:
@@ -70,7 +71,29 @@ class AnalysisService:
         Returns:
             Dictionary containing all calculated statistics
         """
-        if not trades:
+        return self._statistics_from_arrays(_to_arrays(trades))
+
+
+    def analyze_trades(self, trades: List[Any]) -> Tuple[Dict[str, Any], List[PatternDetectionResult]]:
+        """
+        Calculate statistics and detect patterns in one go.
+
+        Equivalent to calling calculate_statistics and detect_patterns, but
+        the trades are converted to column arrays only once.
+
+        Args:
+            trades: List of Trade objects
+
+        Returns:
+            Tuple of (statistics dict, detected patterns)
+        """
+        arrays = _to_arrays(trades)
+        return self._statistics_from_arrays(arrays), self._patterns_from_arrays(arrays)
+
+
+    def _statistics_from_arrays(self, arrays: TradeArrays) -> Dict[str, Any]:
+        """Build the statistics dict from pre-converted trade arrays."""
+        if not len(arrays):
             return {
                 "total_trades": 0,
                 "winning_trades": 0,
@@ -86,57 +109,30 @@ class AnalysisService:
                 "most_traded_contract_type": "N/A",
             }
 
-        # Separate winning and losing trades
-        profits = []
-        losses = []
-        for t in trades:
-            pl = t.get('sell_price', 0) - t.get('buy_price', 0) or 0
-            if pl > 0:
-                profits.append(pl)
-            elif pl < 0:
-                losses.append(pl)
-
-        # Calculate trade durations
-        durations = []
-        for t in trades:
-            sell_time = t.get('sell_time', None)
-            purchase_time = t.get('purchase_time', None)
-            if type(sell_time) is float or type(sell_time) is int:
-                sell_time = datetime.fromtimestamp(sell_time)
-            if type(purchase_time) is float or type(purchase_time) is int:
-                purchase_time = datetime.fromtimestamp(purchase_time)
-            if sell_time and purchase_time:
-                duration = (sell_time - purchase_time).total_seconds() / 3600
-                durations.append(duration)
-
-        # Count symbols and contract types
-        symbol_counts: Dict[str, int] = {}
-        contract_counts: Dict[str, int] = {}
-        for t in trades:
-            symbol = t.get('underlying_symbol', 'Unknown')
-            contract = t.get('contract_type', 'Unknown')
-            symbol_counts[symbol] = symbol_counts.get(symbol, 0) + 1
-            contract_counts[contract] = contract_counts.get(contract, 0) + 1
+        pl = arrays.pl
+        profits = pl[pl > 0]
+        losses = pl[pl < 0]
 
-        total_pl = sum((t.get('sell_price', 0) - t.get('buy_price', 0)) or 0 for t in trades)
+        has_times = ~(np.isnat(arrays.sell) | np.isnat(arrays.purchase))
+        durations = (arrays.sell[has_times] - arrays.purchase[has_times]) / np.timedelta64(1, 'h')
 
         return {
-            "total_trades": len(trades),
-            "winning_trades": len(profits),
-            "losing_trades": len(losses),
-            "win_rate": self.calculate_win_rate(trades),
-            "total_profit_loss": round(total_pl, 2),
-            "average_profit": round(statistics.mean(profits), 2) if profits else 0.0,
-            "average_loss": round(statistics.mean(losses), 2) if losses else 0.0,
-            "largest_win": round(max(profits), 2) if profits else 0.0,
-            "largest_loss": round(min(losses), 2) if losses else 0.0,
-            "average_trade_duration_hours": round(statistics.mean(durations), 2) if durations else 0.0,
-            "most_traded_symbol": max(symbol_counts, key=symbol_counts.get) if symbol_counts else "N/A",
-            "most_traded_contract_type": max(contract_counts, key=contract_counts.get) if contract_counts else "N/A",
+            "total_trades": len(arrays),
+            "winning_trades": int(profits.size),
+            "losing_trades": int(losses.size),
+            "win_rate": profits.size / len(arrays) * 100,
+            "total_profit_loss": round(float(pl.sum()), 2),
+            "average_profit": round(float(profits.mean()), 2) if profits.size else 0.0,
+            "average_loss": round(float(losses.mean()), 2) if losses.size else 0.0,
+            "largest_win": round(float(profits.max()), 2) if profits.size else 0.0,
+            "largest_loss": round(float(losses.min()), 2) if losses.size else 0.0,
+            "average_trade_duration_hours": round(float(durations.mean()), 2) if durations.size else 0.0,
+            "most_traded_symbol": Counter(arrays.symbol).most_common(1)[0][0],
+            "most_traded_contract_type": Counter(arrays.contract).most_common(1)[0][0],
         }
 
 
-    def detect_patterns(self, trades: List[Any]) -> List[PatternDetectionResult]:
+    def detect_patterns(self, trades: List[Any], assume_sorted: bool = False) -> List[PatternDetectionResult]:
         """
         Detect trading patterns from trade history.
 
@@ -149,34 +145,45 @@ class AnalysisService:
 
         Args:
             trades: List of Trade objects
+            assume_sorted: Trades are already in ascending purchase-time
+                order (e.g. from _get_mock_trades), so skip sorting
 
         Returns:
             List of detected patterns with confidence scores
         """
+        return self._patterns_from_arrays(_to_arrays(trades), assume_sorted)
+
+
+    def _patterns_from_arrays(self, arrays: TradeArrays, assume_sorted: bool = False) -> List[PatternDetectionResult]:
+        """Run every pattern detector over pre-converted trade arrays."""
         patterns = []
 
-        if not trades:
+        if not len(arrays):
             return patterns
 
         # Sort by purchase time
-        sorted_trades = sorted(trades, key=lambda t: t.get('purchase_time', datetime.min))
+        if not assume_sorted:
+            arrays = _sort_by_purchase(arrays)
+
+        # Aggregate everything the detectors need in one go
+        stats = _compute_pattern_stats(arrays)
 
         # Detect revenge trading
-        patterns.append(self._detect_revenge_trading(sorted_trades))
+        patterns.append(self._detect_revenge_trading(stats))
 
         # Detect overtrading
-        patterns.append(self._detect_overtrading(sorted_trades))
+        patterns.append(self._detect_overtrading(stats))
 
         # Detect consistent timing (positive pattern)
-        patterns.append(self._detect_consistent_timing(sorted_trades))
+        patterns.append(self._detect_consistent_timing(stats))
 
         # Detect risk issues
-        patterns.append(self._detect_risk_issues(sorted_trades))
+        patterns.append(self._detect_risk_issues(stats))
 
         return patterns
 
 
-    def _detect_revenge_trading(self, trades: List[Any]) -> PatternDetectionResult:
+    def _detect_revenge_trading(self, stats: PatternStats) -> PatternDetectionResult:
         """
         Detect revenge trading pattern.
 
@@ -184,7 +191,7 @@ class AnalysisService:
         - 3+ consecutive losses are followed by rapid new trades
         - New trade occurs within 30 minutes of a loss
         """
-        if len(trades) < 3:
+        if stats.trade_count < 3:
             return PatternDetectionResult(
                 pattern=TradingPattern.REVENGE_TRADING,
                 detected=False,
@@ -192,35 +199,10 @@ class AnalysisService:
                 details="Insufficient data for analysis (need at least 3 trades)"
             )
 
-        rapid_trades_after_loss = 0
-        consecutive_losses = 0
-        max_consecutive_losses = 0
-
-        for i in range(1, len(trades)):
-            prev_trade = trades[i - 1]
-            curr_trade = trades[i]
-
-            prev_pl = (prev_trade.get('sell_price', 0) - prev_trade.get('buy_price', 0)) or 0
-            prev_time = prev_trade.get('purchase_time', datetime.min)
-            curr_time = curr_trade.get('purchase_time', datetime.min)
-            
-            if type(prev_time) is float or type(prev_time) is int:
-                prev_time = datetime.fromtimestamp(prev_time)
-            if type(curr_time) is float or type(curr_time) is int:
-                curr_time = datetime.fromtimestamp(curr_time)
-
-            # Check if previous trade was a loss
-            if prev_pl < 0:
-                consecutive_losses += 1
-                max_consecutive_losses = max(max_consecutive_losses, consecutive_losses)
-                # Check if current trade was within 30 minutes
-                time_diff = (curr_time - prev_time).total_seconds() / 60
-                if time_diff < 30:
-                    rapid_trades_after_loss += 1
-            else:
-                consecutive_losses = 0
-
-        ratio = rapid_trades_after_loss / (len(trades) - 1) if len(trades) > 1 else 0
+        rapid_trades_after_loss = stats.rapid_trades_after_loss
+        max_consecutive_losses = stats.max_consecutive_losses
+
+        ratio = rapid_trades_after_loss / (stats.trade_count - 1)
         detected = ratio > 0.25 or max_consecutive_losses >= 3
 
         return PatternDetectionResult(
@@ -231,13 +213,13 @@ class AnalysisService:
         )
 
 
-    def _detect_overtrading(self, trades: List[Any]) -> PatternDetectionResult:
+    def _detect_overtrading(self, stats: PatternStats) -> PatternDetectionResult:
         """
         Detect overtrading pattern.
 
         Overtrading is identified when average trades per day > 10
         """
-        if len(trades) < 2:
+        if stats.trade_count < 2:
             return PatternDetectionResult(
                 pattern=TradingPattern.OVERTRADING,
                 detected=False,
@@ -245,15 +227,8 @@ class AnalysisService:
                 details="Insufficient data for analysis"
             )
 
-        first_trade_time = trades[0].get('purchase_time', datetime.now())
-        last_trade_time = trades[-1].get('purchase_time', datetime.now())
-        if type(first_trade_time) is float or type(first_trade_time) is int:
-            first_trade_time = datetime.fromtimestamp(first_trade_time)
-        if type(last_trade_time) is float or type(last_trade_time) is int:
-            last_trade_time = datetime.fromtimestamp(last_trade_time)
-
-        date_range = (last_trade_time - first_trade_time).days or 1
-        trades_per_day = len(trades) / date_range
+        date_range = stats.date_range_days
+        trades_per_day = stats.trade_count / date_range
 
         # More than 10 trades per day indicates overtrading
         detected = trades_per_day > 10
@@ -267,13 +242,13 @@ class AnalysisService:
         )
 
 
-    def _detect_consistent_timing(self, trades: List[Any]) -> PatternDetectionResult:
+    def _detect_consistent_timing(self, stats: PatternStats) -> PatternDetectionResult:
         """
         Detect consistent trading timing (positive pattern).
 
         Consistent timing indicates discipline and routine.
         """
-        if len(trades) < 5:
+        if stats.trade_count < 5:
             return PatternDetectionResult(
                 pattern=TradingPattern.CONSISTENT_TIMING,
                 detected=False,
@@ -281,19 +256,15 @@ class AnalysisService:
                 details="Insufficient data for analysis (need at least 5 trades)"
             )
 
-        # Extract trading hours
-        hours = []
-        for t in trades:
-            purchase_time = t.get('purchase_time', datetime.now())
-            if type(purchase_time) is float or type(purchase_time) is int:
-                purchase_time = datetime.fromtimestamp(purchase_time)
-            hours.append(purchase_time.hour)
-
-        # Calculate standard deviation of trading hours
-        if len(set(hours)) == 1:
-            std_dev = 0
+        # Calculate standard deviation of trading hours (sample stdev). Hours
+        # are small integers, so sum / sum of squares are exact and one
+        # pass is enough - no mean-centred temporary array needed.
+        n = stats.hour_count
+        if n > 1:
+            variance = (n * stats.hour_sumsq - stats.hour_sum * stats.hour_sum) / (n * (n - 1))
+            std_dev = math.sqrt(variance)
         else:
-            std_dev = statistics.stdev(hours)
+            std_dev = 0.0
 
         # Low standard deviation indicates consistent timing
         detected = std_dev < 3
@@ -307,13 +278,13 @@ class AnalysisService:
         )
 
 
-    def _detect_risk_issues(self, trades: List[Any]) -> PatternDetectionResult:
+    def _detect_risk_issues(self, stats: PatternStats) -> PatternDetectionResult:
         """
         Detect risk management issues.
 
         Risk issues identified when average loss > 2x average win.
         """
-        if len(trades) < 3:
+        if stats.trade_count < 3:
             return PatternDetectionResult(
                 pattern=TradingPattern.RISK_ISSUES,
                 detected=False,
@@ -321,10 +292,7 @@ class AnalysisService:
                 details="Insufficient data for analysis"
             )
 
-        profits = [(t.get('sell_price', 0) - t.get('buy_price', 0)) or 0 for t in trades if (t.get('sell_price', 0) - t.get('buy_price', 0)) > 0]
-        losses = [(t.get('sell_price', 0) - t.get('buy_price', 0)) for t in trades if (t.get('sell_price', 0) - t.get('buy_price', 0)) < 0]
-
-        if not profits or not losses:
+        if not stats.profit_count or not stats.loss_count:
             return PatternDetectionResult(
                 pattern=TradingPattern.RISK_ISSUES,
                 detected=False,
@@ -332,8 +300,8 @@ class AnalysisService:
                 details="Need both winning and losing trades for risk analysis"
             )
 
-        avg_profit = statistics.mean(profits)
-        avg_loss = statistics.mean(losses)
+        avg_profit = stats.profit_sum / stats.profit_count
+        avg_loss = stats.loss_sum / stats.loss_count
 
         # Risk issues if average loss is more than 2x average profit
         ratio = avg_loss / avg_profit if avg_profit > 0 else float('inf')
@@ -362,52 +330,48 @@ class AnalysisService:
             List of MockTrade objects
         """
         # TODO: use deriv helper to get trades via API
-        random.seed(user_id * 100 + days)  # Consistent data per user/period
+        rng = np.random.default_rng(user_id * 100 + days)  # Consistent data per user/period
 
         base_time = datetime.now() - timedelta(days=days)
-        mock_trades = []
 
         symbols = ["EURUSD", "Volatility 75", "BTC/USD", "AAPL", "TSLA"]
         contract_types = ["CALL", "PUT", "MULTIPLIER"]
 
         # Generate realistic number of trades
-        num_trades = random.randint(5, min(days * 5, 50))
-
-        for i in range(num_trades):
-            # Randomize trade parameters
-            buy_price = random.uniform(100, 1000)
-            # Slightly favor profitable trades for realistic data
-            is_winner = random.random() < 0.55
-            if is_winner:
-                profit_pct = random.uniform(0.01, 0.08)
-            else:
-                profit_pct = random.uniform(-0.10, -0.01)
-
-            sell_price = buy_price * (1 + profit_pct)
-            profit_loss = sell_price - buy_price
-
-            purchase_time = base_time + timedelta(
-                hours=random.randint(0, days * 24)
-            )
-            # Add some time for trade duration
-            trade_duration = timedelta(hours=random.uniform(0.5, 48))
-            sell_time = purchase_time + trade_duration
-
-            mock_trades.append(TradeData(
-                id=i + 1,
+        num_trades = int(rng.integers(5, min(days * 5, 50), endpoint=True))
+
+        # Draw every trade parameter in one batch per column
+        buy_prices = rng.uniform(100, 1000, num_trades)
+        # Slightly favor profitable trades for realistic data
+        is_winner = rng.random(num_trades) < 0.55
+        profit_pcts = np.where(
+            is_winner,
+            rng.uniform(0.01, 0.08, num_trades),
+            rng.uniform(-0.10, -0.01, num_trades)
+        )
+        sell_prices = buy_prices * (1 + profit_pcts)
+        purchase_hours = rng.integers(0, days * 24, num_trades, endpoint=True)
+        # Add some time for trade duration
+        duration_hours = rng.uniform(0.5, 48, num_trades)
+        symbol_idx = rng.integers(0, len(symbols), num_trades)
+        contract_idx = rng.integers(0, len(contract_types), num_trades)
+
+        # Materialise in purchase-time order so no sort is needed afterwards
+        mock_trades = []
+        for i in np.argsort(purchase_hours, kind='stable'):
+            purchase_time = base_time + timedelta(hours=int(purchase_hours[i]))
+            mock_trades.append(MockTradeData(
+                id=len(mock_trades) + 1,
                 user_id=user_id,
-                contract_type=random.choice(contract_types),
-                symbol=random.choice(symbols),
-                buy_price=round(buy_price, 2),
-                sell_price=round(sell_price, 2),
-                profit_loss=round(profit_loss, 2),
+                contract_type=contract_types[contract_idx[i]],
+                symbol=symbols[symbol_idx[i]],
+                buy_price=round(float(buy_prices[i]), 2),
+                sell_price=round(float(sell_prices[i]), 2),
+                profit_loss=round(float(sell_prices[i] - buy_prices[i]), 2),
                 purchase_time=purchase_time,
-                sell_time=sell_time
+                sell_time=purchase_time + timedelta(hours=float(duration_hours[i]))
             ))
 
-        # Sort by purchase time
-        mock_trades.sort(key=lambda t: t.purchase_time)
-
         return mock_trades
 
 
@@ -429,20 +393,103 @@ class AnalysisService:
             return f"{hours / 24:.1f} days"
 
 
-# Singleton instance
-_analysis_service: Optional[AnalysisService] = None
+def _to_datetime(value: Any) -> Optional[datetime]:
+    """Normalise a trade timestamp (datetime or Unix seconds) to a datetime."""
+    if type(value) is float or type(value) is int:
+        return datetime.fromtimestamp(value)
+    return value or None
+
+
+def _to_arrays(trades: List[Any]) -> TradeArrays:
+    """
+    Convert a list of trade dicts into column arrays for vectorised analysis.
+
+    Args:
+        trades: List of trade dicts as returned by the Deriv API
+
+    Returns:
+        TradeArrays with one entry per trade, in input order
+    """
+    return TradeArrays(
+        pl=np.array([t.get('sell_price', 0) - t.get('buy_price', 0) or 0 for t in trades], dtype=np.float64),
+        purchase=np.array([_to_datetime(t.get('purchase_time')) for t in trades], dtype='datetime64[us]'),
+        sell=np.array([_to_datetime(t.get('sell_time')) for t in trades], dtype='datetime64[us]'),
+        symbol=[t.get('underlying_symbol', 'Unknown') for t in trades],
+        contract=[t.get('contract_type', 'Unknown') for t in trades],
+    )
+
+
+def _compute_pattern_stats(arrays: TradeArrays) -> PatternStats:
+    """
+    Compute every aggregate the pattern detectors use from sorted trade arrays.
+
+    Args:
+        arrays: Trades sorted by purchase time
+
+    Returns:
+        PatternStats for the batch
+    """
+    pl = arrays.pl
+    purchase = arrays.purchase
+
+    # Every trade except the last is a "previous" trade for the next one
+    minutes_to_next = np.diff(purchase) / np.timedelta64(1, 'm')
+    rapid_trades_after_loss, max_consecutive_losses = revenge_stats(pl[:-1], minutes_to_next)
+
+    date_range_days = 1
+    if pl.size > 1:
+        span = purchase[-1] - purchase[0]
+        if not np.isnat(span):
+            date_range_days = int(span // np.timedelta64(1, 'D')) or 1
+
+    known = purchase[~np.isnat(purchase)]
+    hours = ((known - known.astype('datetime64[D]')) // np.timedelta64(1, 'h')).astype(np.int64)
+
+    profits = pl[pl > 0]
+    losses = pl[pl < 0]
+
+    return PatternStats(
+        trade_count=int(pl.size),
+        rapid_trades_after_loss=rapid_trades_after_loss,
+        max_consecutive_losses=max_consecutive_losses,
+        date_range_days=date_range_days,
+        hour_count=int(hours.size),
+        hour_sum=int(hours.sum()),
+        hour_sumsq=int(hours @ hours),
+        profit_count=int(profits.size),
+        profit_sum=float(profits.sum()),
+        loss_count=int(losses.size),
+        loss_sum=float(losses.sum()),
+    )
+
+
+def _sort_by_purchase(arrays: TradeArrays) -> TradeArrays:
+    """Reorder all columns by purchase time (stable, missing times last)."""
+    # Already ascending (and no missing times): an O(N) check beats re-sorting
+    if not np.isnat(arrays.purchase).any() and (np.diff(arrays.purchase) >= np.timedelta64(0)).all():
+        return arrays
+
+    order = np.argsort(arrays.purchase, kind='stable')
+    return TradeArrays(
+        pl=arrays.pl[order],
+        purchase=arrays.purchase[order],
+        sell=arrays.sell[order],
+        symbol=[arrays.symbol[i] for i in order],
+        contract=[arrays.contract[i] for i in order],
+    )
+
+
+# Singleton instance, created at import (the constructor does no I/O)
+_analysis_service: AnalysisService = AnalysisService()
 
 def get_analysis_service() -> AnalysisService:
     """Get the singleton AnalysisService instance."""
-    global _analysis_service
-    if _analysis_service is None:
-        _analysis_service = AnalysisService()
     return _analysis_service
 
 # Example usage
 if __name__ == "__main__":
     service = get_analysis_service()
-    trades = asyncio.get_event_loop().run_until_complete(service.get_trades(limit=100))
+    trades = asyncio.run(service.get_trades(limit=100))
     stats = service.calculate_statistics(trades)
     patterns = service.detect_patterns(trades)
 
@@ -0,0 +1,75 @@
+"""
+Numeric Kernels for Trade Pattern Detection
+
+Hot loops used by the analysis service, written over plain NumPy arrays.
+When numba is installed the loop kernels are JIT-compiled (and cached on
+disk); otherwise an equivalent vectorised NumPy implementation is used.
+numba is only imported the first time a kernel runs, so workers that
+never analyse trades don't pay for loading it (and LLVM) at startup.
+"""
+from typing import Callable, Optional, Tuple
+import numpy as np
+
+
+def _revenge_stats_loop(prev_pl: np.ndarray, minutes_to_next: np.ndarray) -> Tuple[int, int]:
+    """Single-pass loop version, compiled with numba when available."""
+    rapid = 0
+    consecutive = 0
+    max_consecutive = 0
+    for i in range(prev_pl.size):
+        if prev_pl[i] < 0:
+            consecutive += 1
+            if consecutive > max_consecutive:
+                max_consecutive = consecutive
+            if minutes_to_next[i] < 30:
+                rapid += 1
+        else:
+            consecutive = 0
+    return rapid, max_consecutive
+
+
+def _revenge_stats_numpy(prev_pl: np.ndarray, minutes_to_next: np.ndarray) -> Tuple[int, int]:
+    """Vectorised NumPy version, used when numba is not installed."""
+    prev_is_loss = prev_pl < 0
+    rapid = int((prev_is_loss & (minutes_to_next < 30)).sum())
+
+    # Each non-loss starts a new run id; counting losses per run id gives
+    # every loss streak's length without a per-trade branch
+    run_ids = np.cumsum(~prev_is_loss)
+    streaks = np.bincount(run_ids[prev_is_loss])
+    max_consecutive = int(streaks.max()) if streaks.size else 0
+    return rapid, max_consecutive
+
+
+# Lazy-loaded kernel, resolved on first use
+_revenge_stats: Optional[Callable[[np.ndarray, np.ndarray], Tuple[int, int]]] = None
+
+def _get_revenge_stats() -> Callable[[np.ndarray, np.ndarray], Tuple[int, int]]:
+    """Pick the numba-compiled kernel if numba is installed, else the NumPy one."""
+    global _revenge_stats
+    if _revenge_stats is None:
+        try:
+            from numba import njit
+            _revenge_stats = njit(cache=True)(_revenge_stats_loop)
+        except ImportError:
+            _revenge_stats = _revenge_stats_numpy
+    return _revenge_stats
+
+
+def revenge_stats(prev_pl: np.ndarray, minutes_to_next: np.ndarray) -> Tuple[int, int]:
+    """
+    Count rapid re-entries after losses and the longest loss streak.
+
+    Args:
+        prev_pl: float64 P/L of every trade except the last
+        minutes_to_next: float64 minutes from each of those trades to the
+            next one (NaN when a purchase time is missing)
+
+    Returns:
+        Tuple of (rapid trades after a loss, max consecutive losses)
+    """
+    rapid, max_consecutive = _get_revenge_stats()(
+        np.ascontiguousarray(prev_pl, dtype=np.float64),
+        np.ascontiguousarray(minutes_to_next, dtype=np.float64)
+    )
+    return int(rapid), int(max_consecutive)
@@ -2,7 +2,8 @@
 from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Protocol
+from typing import List, Optional, Protocol
+import numpy as np
 
 
 class TradeProtocol(Protocol):
@@ -29,7 +30,7 @@ class TradingPattern(Enum):
     RISK_ISSUES = "risk_issues"
 
 
-@dataclass
+@dataclass(slots=True)
 class PatternDetectionResult:
     """Result of pattern detection analysis."""
     pattern: TradingPattern
@@ -38,7 +39,7 @@ class PatternDetectionResult:
     details: str
 
 
-@dataclass
+@dataclass(slots=True)
 class MockTradeData:
     """Mock Trade object (matches database model)."""
     id: int
@@ -51,7 +52,7 @@ class MockTradeData:
     purchase_time: datetime
     sell_time: datetime
 
-@dataclass
+@dataclass(slots=True)
 class TradeData:
     """Trade object (matches database model)."""
     app_id: int
@@ -67,4 +68,32 @@ class TradeData:
     sell_time: datetime
     shortcode: str
     transaction_id: int
-    underlying_symbol: str
\ No newline at end of file
+    underlying_symbol: str
+
+@dataclass(slots=True)
+class TradeArrays:
+    """Column-wise (structure-of-arrays) view of a batch of trades."""
+    pl: np.ndarray  # float64 profit/loss per trade
+    purchase: np.ndarray  # datetime64[us], NaT when missing
+    sell: np.ndarray  # datetime64[us], NaT when missing
+    symbol: List[str]
+    contract: List[str]
+
+    def __len__(self) -> int:
+        return self.pl.size
+
+
+@dataclass(slots=True)
+class PatternStats:
+    """Aggregates shared by the pattern detectors, computed once per batch."""
+    trade_count: int
+    rapid_trades_after_loss: int
+    max_consecutive_losses: int
+    date_range_days: int  # whole days between first and last purchase, at least 1
+    hour_count: int
+    hour_sum: int
+    hour_sumsq: int
+    profit_count: int
+    profit_sum: float
+    loss_count: int
+    loss_sum: float
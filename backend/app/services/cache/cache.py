@@ -0,0 +1,218 @@
+"""
+In-Process TTL Cache
+
+Small time-based cache used to avoid repeating expensive upstream calls
+(LLM completions, Deriv API lookups) when the same request is made again
+within a short window, a semantic variant that matches near-identical
+requests by embedding similarity, plus a single-flight helper that
+collapses concurrent identical calls into one.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+
+class TTLCache:
+    """
+    Least-recently-used cache whose entries expire after a fixed TTL.
+
+    Entries are stored with their expiry time; expired entries are
+    dropped lazily on lookup, and the oldest entry is evicted once
+    `maxsize` is reached.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        """
+        Args:
+            ttl: Time-to-live for each entry, in seconds
+            maxsize: Maximum number of entries kept in memory
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for `key`, or None if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store `value` under `key`, evicting the least recently used entry if full.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Optional per-entry TTL in seconds, overriding the cache default
+        """
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SemanticCache:
+    """
+    TTL cache looked up by embedding similarity instead of exact key.
+
+    Keys are embedding vectors stored as rows of one normalized matrix, so
+    a lookup is a single matrix-vector product; the best row scoring at
+    least `threshold` (cosine) is a hit. Entries are partitioned by an exact
+    `scope` (e.g. a user id) so near-identical keys never match across
+    scopes. The least recently used entry is evicted once `maxsize` is
+    reached.
+    """
+
+    def __init__(self, threshold: float, ttl: float, maxsize: int = 256):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            ttl: Time-to-live for each entry, in seconds
+            maxsize: Maximum number of entries kept in memory
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._vectors: Optional[np.ndarray] = None
+        self._scopes: List[Hashable] = []
+        self._values: List[Any] = []
+        self._expires: List[float] = []
+        self._last_used: List[float] = []
+
+    def get(self, scope: Hashable, vector: np.ndarray) -> Optional[Any]:
+        """Return the value of the most similar live entry in `scope`, or None."""
+        query = self._normalize(vector)
+        if self._vectors is None or query is None or query.shape[0] != self._vectors.shape[1]:
+            return None
+
+        now = time.monotonic()
+        sims = self._vectors @ query
+        live = np.fromiter(
+            (s == scope and e >= now for s, e in zip(self._scopes, self._expires)),
+            dtype=bool,
+            count=len(self._scopes)
+        )
+        if not live.any():
+            return None
+
+        sims[~live] = -np.inf
+        best = int(np.argmax(sims))
+        if sims[best] < self.threshold:
+            return None
+
+        self._last_used[best] = now
+        return self._values[best]
+
+    def set(self, scope: Hashable, vector: np.ndarray, value: Any) -> None:
+        """Store `value` under the embedding `vector` in `scope`."""
+        row = self._normalize(vector)
+        if row is None:
+            return
+        if self._vectors is not None and row.shape[0] != self._vectors.shape[1]:
+            # Embedding model changed (e.g. fell back); old keys can't be compared
+            self.clear()
+
+        now = time.monotonic()
+        self._evict(now)
+        if self._vectors is None:
+            self._vectors = row[np.newaxis, :]
+        else:
+            self._vectors = np.vstack((self._vectors, row))
+        self._scopes.append(scope)
+        self._values.append(value)
+        self._expires.append(now + self.ttl)
+        self._last_used.append(now)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._vectors = None
+        self._scopes.clear()
+        self._values.clear()
+        self._expires.clear()
+        self._last_used.clear()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones, to make room for one more."""
+        keep = [i for i, e in enumerate(self._expires) if e >= now]
+        while len(keep) >= self.maxsize:
+            keep.remove(min(keep, key=self._last_used.__getitem__))
+        if len(keep) == len(self._values):
+            return
+        if not keep:
+            self.clear()
+            return
+
+        self._vectors = self._vectors[keep]
+        self._scopes = [self._scopes[i] for i in keep]
+        self._values = [self._values[i] for i in keep]
+        self._expires = [self._expires[i] for i in keep]
+        self._last_used = [self._last_used[i] for i in keep]
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> Optional[np.ndarray]:
+        """L2-normalize a vector as float32, or None for a zero vector."""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent async calls that share a key.
+
+    The first caller for a key starts the fetch as its own task; callers
+    arriving while it is still in flight await the same result (or
+    exception) instead of issuing their own request. Every caller awaits
+    the task through a shield, so cancelling one caller (e.g. a dropped
+    client) never cancels the shared fetch for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `fetch` for `key`, or join the call already in flight for it.
+
+        Args:
+            key: Identifies equivalent calls
+            fetch: Zero-argument coroutine factory performing the real call
+
+        Returns:
+            The result of the (shared) fetch
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        """Forget a finished fetch; mark its exception retrieved if nobody awaited it."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
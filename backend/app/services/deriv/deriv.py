@@ -5,14 +5,30 @@ Fetches real-time market data from Deriv API to provide context
 for AI-generated responses and insights.
 """
 
-from typing import Dict, Any, Optional, List
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, List
 from app.services.logger.logger import logger
-from app.config.deriv import deriv_api_token, DerivAPI, deriv_app_id
+from app.config.deriv import DerivAPI, get_deriv_settings
 from app.services.deriv.typings import AccountInfo
+from app.services.cache.cache import SingleFlight, TTLCache
+from itertools import islice
 import asyncio
 
 # TODO: check typings and update as needed
 
+# Max concurrent proposal_open_contract requests when enriching a portfolio
+POC_CONCURRENCY = 8
+# Max seconds spent enriching a portfolio; contracts not enriched by then keep their raw fields
+POC_TIMEOUT = 2.0
+
+# How long fetched account data stays fresh, in seconds (matches how often it changes)
+BALANCE_TTL = 5
+PORTFOLIO_TTL = 10
+EXCHANGE_RATES_TTL = 60
+
+# Format specs for amounts and rates in the market context
+_FMT_MONEY = ",.2f"
+_FMT_RATE = ".4f"
+
 class DerivService:
     """
     Service for fetching market data from Deriv API.
@@ -23,9 +39,50 @@ class DerivService:
 
     def __init__(self):
         """Initialize the market service."""
-        self._token = deriv_api_token
+        settings = get_deriv_settings()
+        if not settings.is_token_configured():
+            logger.warning("DERIV_API_TOKEN not configured. Deriv account data will be unavailable.")
+        self._token = settings.deriv_api_token
+        self._app_id = settings.deriv_app_id
         self._is_authorized = False
         self._api = None
+        self._poc_semaphore: Optional[asyncio.Semaphore] = None
+        self._auth_lock: Optional[asyncio.Lock] = None
+        self._cache = TTLCache(ttl=BALANCE_TTL, maxsize=64)
+        self._inflight = SingleFlight()
+
+    async def _cached(
+        self,
+        key: Hashable,
+        ttl: float,
+        fetch: Callable[[], Awaitable[Optional[Any]]]
+    ) -> Optional[Any]:
+        """
+        Return a recent result for `key`, or call `fetch` and cache its result.
+
+        Concurrent misses for the same key share a single fetch. Failed
+        fetches (None) are not cached so the next call retries.
+        """
+        value = self._cache.get(key)
+        if value is not None:
+            return value
+
+        value = await self._inflight.do(key, fetch)
+        if value is not None:
+            self._cache.set(key, value, ttl=ttl)
+        return value
+
+    def _get_poc_semaphore(self) -> asyncio.Semaphore:
+        """Semaphore bounding concurrent contract detail lookups, created on first use."""
+        if self._poc_semaphore is None:
+            self._poc_semaphore = asyncio.Semaphore(POC_CONCURRENCY)
+        return self._poc_semaphore
+
+    def _get_auth_lock(self) -> asyncio.Lock:
+        """Lock serialising the authorize call, created on first use."""
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        return self._auth_lock
 
     def _get_deriv_api(self):
         """Get the configured Deriv API instance, lazy-loaded and reconnect if closed."""
@@ -34,16 +91,42 @@ class DerivService:
         if self._api is None:
             reconnect = True
         else:
-            # Check if the WebSocket inside DerivAPI exists and is open
+            # DerivAPI rejects its `connected` future once the WebSocket closes;
+            # while it is pending or resolved the existing connection is reused
             try:
-                # Some DerivAPI clients use self.ws.sock.connected
-                if not getattr(self._api, 'ws', None) or not getattr(self._api.ws, 'sock', None) or not self._api.ws.sock.connected:
+                if self._api.connected.is_rejected():
                     reconnect = True
             except Exception:
                 reconnect = True
 
         if reconnect:
-            self._api = DerivAPI(app_id=deriv_app_id)
+            self._api = DerivAPI(app_id=self._app_id)
+            self._is_authorized = False
+
+        return self._api
+
+    async def _ensure_authorized(self, api) -> bool:
+        """
+        Authorize `api` with the account token once per connection.
+
+        Authorization sticks to the WebSocket, so it is only repeated after
+        _get_deriv_api opens a new connection.
+
+        Returns:
+            True if the connection is authorized
+        """
+        if self._is_authorized:
+            return True
+
+        async with self._get_auth_lock():
+            if not self._is_authorized:
+                try:
+                    await api.authorize(self._token)
+                    self._is_authorized = True
+                except Exception as e:
+                    logger.error(f"Failed to authorize with Deriv: {e}")
+
+        return self._is_authorized
 
     async def get_account_balance(self) -> Optional[AccountInfo]:
         """
@@ -52,13 +135,16 @@ class DerivService:
         Returns:
             AccountInfo with balance details, or None if unavailable
         """
-        self._get_deriv_api()
-        if not self._api:
+        return await self._cached("balance", BALANCE_TTL, self._fetch_account_balance)
+
+    async def _fetch_account_balance(self) -> Optional[AccountInfo]:
+        """Fetch the account balance from Deriv, bypassing the cache."""
+        api = self._get_deriv_api()
+        if not api or not await self._ensure_authorized(api):
             return None
 
         try:
-            await self._api.authorize(self._token)
-            balance_response = await self._api.balance()
+            balance_response = await api.balance()
             if balance_response and "balance" in balance_response:
                 balance_data = balance_response["balance"]
                 return AccountInfo(
@@ -71,38 +157,59 @@ class DerivService:
 
         return None
 
-    async def get_portfolio(self) -> Optional[Dict[str, Any]]:
+    async def get_portfolio(self, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
         Get user's current portfolio/positions from Deriv.
 
+        Args:
+            limit: Only enrich the first `limit` contracts with live profit
+                data; the rest are returned with their raw portfolio fields
+
         Returns:
             Dictionary with portfolio data, or None if unavailable
         """
-        self._get_deriv_api()
-        if not self._api:
+        return await self._cached(
+            ("portfolio", limit),
+            PORTFOLIO_TTL,
+            lambda: self._fetch_portfolio(limit)
+        )
+
+    async def _fetch_portfolio(self, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Fetch the portfolio from Deriv, bypassing the cache."""
+        api = self._get_deriv_api()
+        if not api or not await self._ensure_authorized(api):
             return None
 
         try:
-            await self._api.authorize(self._token)
-            portfolio_response = await self._api.portfolio()
+            portfolio_response = await api.portfolio()
 
             if portfolio_response and "portfolio" in portfolio_response:
                 contracts = portfolio_response["portfolio"].get("contracts", [])
                 
-                # Enrich contracts with real-time profit data
+                # Enrich contracts with real-time profit data, a few at a time
+                semaphore = self._get_poc_semaphore()
+
                 async def fetch_contract_details(contract):
                     try:
-                        poc = await self._api.proposal_open_contract({"contract_id": contract["contract_id"]})
+                        async with semaphore:
+                            poc = await api.proposal_open_contract({"contract_id": contract["contract_id"]})
                         if poc and "proposal_open_contract" in poc:
                             details = poc["proposal_open_contract"]
                             contract["profit"] = details.get("profit", 0)
                             contract["current_price"] = details.get("bid_price", 0)
                     except Exception as e:
                         logger.warning(f"Failed to fetch details for contract {contract.get('contract_id')}: {e}")
-                    return contract
 
-                if contracts:
-                    contracts = await asyncio.gather(*[fetch_contract_details(c) for c in contracts])
+                # Contracts are enriched in place; any still pending after
+                # POC_TIMEOUT are cancelled and keep their raw fields
+                to_enrich = contracts[:limit] if limit is not None else contracts
+                if to_enrich:
+                    tasks = [asyncio.create_task(fetch_contract_details(c)) for c in to_enrich]
+                    _, pending = await asyncio.wait(tasks, timeout=POC_TIMEOUT)
+                    for task in pending:
+                        task.cancel()
+                    if pending:
+                        logger.warning(f"Timed out enriching {len(pending)} of {len(tasks)} contracts")
 
                 return {
                     "positions_count": len(contracts),
@@ -123,13 +230,20 @@ class DerivService:
         Returns:
             Dictionary of currency rates, or None if unavailable
         """
-        self._get_deriv_api()
-        if not self._api:
+        return await self._cached(
+            ("exchange_rates", base_currency),
+            EXCHANGE_RATES_TTL,
+            lambda: self._fetch_exchange_rates(base_currency)
+        )
+
+    async def _fetch_exchange_rates(self, base_currency: str) -> Optional[Dict[str, float]]:
+        """Fetch exchange rates from Deriv, bypassing the cache."""
+        api = self._get_deriv_api()
+        if not api or not await self._ensure_authorized(api):
             return None
 
         try:
-            await self._api.authorize(self._token)
-            rates_response = await self._api.exchange_rates({"base_currency": base_currency})
+            rates_response = await api.exchange_rates({"base_currency": base_currency})
 
             if rates_response and "exchange_rates" in rates_response:
                 return rates_response["exchange_rates"].get("rates", {})
@@ -138,26 +252,27 @@ class DerivService:
 
         return None
 
-    async def get_recent_trades(self, limit: int = 5) -> List[Dict[str, Any]]:
+    async def get_recent_trades(self, limit: int = 5, description: bool = True) -> List[Dict[str, Any]]:
         """
         Get recent completed trades (profit table).
 
         Args:
             limit: Number of trades to return
+            description: Include contract descriptions (longcode/shortcode);
+                turn off when only prices and times are needed
 
         Returns:
             List of trade dictionaries
         """
-        self._get_deriv_api()
-        if not self._api:
+        api = self._get_deriv_api()
+        if not api or not await self._ensure_authorized(api):
             return []
 
         try:
             # API call for profit table
             # "description": 1 gets full details, "sort": "DESC" puts newest first usually, 
             # but standard API might just return list. We'll slice it.
-            await self._api.authorize(self._token)
-            response = await self._api.profit_table({"limit": limit, "description": 1})
+            response = await api.profit_table({"limit": limit, "description": int(description)})
             
             if response and "profit_table" in response:
                 transactions = response["profit_table"].get("transactions", [])
@@ -183,42 +298,50 @@ class DerivService:
             Formatted market context string
         """
         context_parts = []
+        add = context_parts.append
 
-        # Get account balance
-        try:
-            account = await self.get_account_balance()
-            if account:
-                context_parts.append(f"Account Balance: {account.currency} {account.balance:,.2f}")
-        except Exception as e:
-            logger.warning(f"Could not fetch account balance: {e}")
-
-        # Get portfolio
-        try:
-            portfolio = await self.get_portfolio()
-            if portfolio:
-                positions = portfolio.get("positions_count", 0)
-                context_parts.append(f"Open Positions: {positions}")
-
-                if positions > 0 and "contracts" in portfolio:
-                    contracts = portfolio["contracts"][:3]  # Show first 3
-                    for contract in contracts:
-                        symbol = contract.get("symbol", "Unknown")
-                        pnl = contract.get("profit", 0)
-                        context_parts.append(f"  - {symbol}: P&L ${pnl:,.2f}")
-        except Exception as e:
-            logger.warning(f"Could not fetch portfolio: {e}")
-
-        # Get exchange rates for preferred assets
+        # Balance, portfolio and rates are independent, so fetch them concurrently;
+        # one failing fetch is logged and skipped without cancelling the others
+        # Only the first 3 contracts are shown, so only those need live P&L
+        fetches = [self.get_account_balance(), self.get_portfolio(limit=3)]
         if preferred_assets:
-            try:
-                rates = await self.get_exchange_rates()
-                if rates:
-                    context_parts.append("Current Rates:")
-                    for asset in preferred_assets[:3]:  # Limit to 3
-                        if asset in rates:
-                            context_parts.append(f"  - {asset}: {rates[asset]:.4f}")
-            except Exception as e:
-                logger.warning(f"Could not fetch exchange rates: {e}")
+            fetches.append(self.get_exchange_rates())
+        account, portfolio, *rest = await asyncio.gather(*fetches, return_exceptions=True)
+        rates = rest[0] if rest else None
+        # Only ordinary errors are skipped; cancellation (and other
+        # BaseExceptions) from a sub-fetch must still propagate
+        for result in (account, portfolio, rates):
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+
+        # Account balance
+        if isinstance(account, Exception):
+            logger.warning(f"Could not fetch account balance: {account}")
+        elif account:
+            add(f"Account Balance: {account.currency} {format(account.balance, _FMT_MONEY)}")
+
+        # Portfolio
+        if isinstance(portfolio, Exception):
+            logger.warning(f"Could not fetch portfolio: {portfolio}")
+        elif portfolio:
+            positions = portfolio.get("positions_count", 0)
+            add(f"Open Positions: {positions}")
+
+            if positions > 0 and "contracts" in portfolio:
+                for contract in islice(portfolio["contracts"], 3):  # Show first 3
+                    symbol = contract.get("symbol", "Unknown")
+                    pnl = contract.get("profit", 0)
+                    add(f"  - {symbol}: P&L ${format(pnl, _FMT_MONEY)}")
+
+        # Exchange rates for preferred assets
+        if isinstance(rates, Exception):
+            logger.warning(f"Could not fetch exchange rates: {rates}")
+        elif rates:
+            add("Current Rates:")
+            # Callers pass assets in preference order, so the first 3 are the most relevant
+            for asset in islice(preferred_assets, 3):
+                if asset in rates:
+                    add(f"  - {asset}: {format(rates[asset], _FMT_RATE)}")
 
         if context_parts:
             return "\n".join(context_parts)
@@ -251,28 +374,30 @@ class DerivService:
             return "Market data temporarily unavailable"
 
 
-# Singleton instance
-_deriv_service: Optional[DerivService] = None
+# Singleton instance, created at import (the constructor does no I/O;
+# the API connection is still opened lazily on first use)
+_deriv_service: DerivService = DerivService()
 
 def get_deriv_service() -> DerivService:
     """Get the singleton DerivService instance."""
-    global _deriv_service
-    if _deriv_service is None:
-        _deriv_service = DerivService()
     return _deriv_service
 
 # Example usage
 if __name__ == "__main__":
-    service = get_deriv_service()
-    account_balance = asyncio.get_event_loop().run_until_complete(service.get_account_balance())
-    print(f"Account Balance: {account_balance}")
-    portfolio = asyncio.get_event_loop().run_until_complete(service.get_portfolio())
-    print(f"Portfolio: {portfolio}")
-    exchange_rates = asyncio.get_event_loop().run_until_complete(service.get_exchange_rates())
-    print(f"Exchange Rates: {exchange_rates}")
-    recent_trades = asyncio.get_event_loop().run_until_complete(service.get_recent_trades())
-    print(f"Recent Trades: {recent_trades}")
-    market_context = asyncio.get_event_loop().run_until_complete(service.get_market_context(preferred_assets=["EURUSD", "GBPUSD", "USDJPY"]))
-    print(f"Market Context:\n{market_context}")
-    market_context_safe = asyncio.get_event_loop().run_until_complete(service.get_market_context_safe(preferred_assets=["EURUSD", "GBPUSD", "USDJPY"]))
-    print(f"Market Context Safe:\n{market_context_safe}")
\ No newline at end of file
+    async def main():
+        # One event loop for all calls: the Deriv websocket is bound to it
+        service = get_deriv_service()
+        account_balance = await service.get_account_balance()
+        print(f"Account Balance: {account_balance}")
+        portfolio = await service.get_portfolio()
+        print(f"Portfolio: {portfolio}")
+        exchange_rates = await service.get_exchange_rates()
+        print(f"Exchange Rates: {exchange_rates}")
+        recent_trades = await service.get_recent_trades()
+        print(f"Recent Trades: {recent_trades}")
+        market_context = await service.get_market_context(preferred_assets=["EURUSD", "GBPUSD", "USDJPY"])
+        print(f"Market Context:\n{market_context}")
+        market_context_safe = await service.get_market_context_safe(preferred_assets=["EURUSD", "GBPUSD", "USDJPY"])
+        print(f"Market Context Safe:\n{market_context_safe}")
+
+    asyncio.run(main())
@@ -2,7 +2,7 @@
 from dataclasses import dataclass
 from datetime import datetime
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MarketSnapshot:
     """Current market data for a symbol."""
     symbol: str
@@ -10,7 +10,7 @@ class MarketSnapshot:
     change_percent: float
     timestamp: datetime
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AccountInfo:
     """User's account information from Deriv."""
     balance: float